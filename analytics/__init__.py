@@ -0,0 +1,25 @@
+"""FloodGate analytics core: loading, cleaning, scoring and aggregating the
+DPWH dataset without Streamlit, so the same hot paths can be profiled, batched
+and reused in notebooks.
+
+    import cProfile
+    from analytics import load_dataset, Filters, apply_filter, forensic_results, frame_version
+
+    df = apply_filter(load_dataset(), Filters(min_anomaly_score=3.5))
+    cProfile.run("forensic_results(frame_version(df), df)", sort="cumtime")
+
+The Streamlit pages reach the same cached functions through utils.py.
+Plotly and folium builders live in analytics.charts and analytics.maps.
+"""
+from analytics.cache import MemoryCache, DiskCache, cached, configure_cache, get_cache
+from analytics.dataset import (
+    build_snapshot, clean_data, dataset_version, ensure_snapshot, frame_version, snapshot_is_fresh,
+    version_of,
+)
+from analytics.filters import Filters, apply_filter, filter_mask, filter_positions
+from analytics.summary import Summary, summarize
+from analytics.pipeline import (
+    load_raw_data, load_raw_page, load_dataset, load_quality_report, load_cost_models, cost_models,
+    isolation_scores, filter_options, filtered_dataset, sort_order, period_rollup, trend_rollup,
+    forensic_results, choropleth_geojson, executors,
+)
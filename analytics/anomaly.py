@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import IsolationForest
+
+# Projects are compared against peers doing the same kind of work, in the
+# same region, in the same funding year.
+PEER_GROUP = ['TypeOfWork', 'Region', 'FundingYear']
+ANOMALY_METRICS = ['ContractCost', 'CostPerDay', 'BudgetVariance']
+MIN_PEERS = 5
+IQR_FENCE = 1.5
+ANOMALY_THRESHOLD = 3.5  # Iglewicz & Hoaglin cut-off for the modified z-score
+
+
+def anomaly_metrics(df):
+    """The per-project values that are scored"""
+    duration = df['Duration'].where(df['Duration'] > 0)
+    return pd.DataFrame({
+        'ContractCost': df['ContractCost'],
+        'CostPerDay': df['ContractCost'] / duration,
+        'BudgetVariance': df['BudgetVariance'],
+    }, index=df.index)
+
+
+def anomaly_scores(df, peer_group=PEER_GROUP, min_peers=MIN_PEERS):
+    """Robust z-scores (median/MAD) and IQR fence flags within peer groups.
+
+    Returns a frame aligned with `df` holding CostPerDay, one `<metric>Z` and
+    one `<metric>IQR` column per metric, AnomalyScore (largest absolute z)
+    and IsAnomaly. Groups with fewer than `min_peers` projects are not scored.
+    """
+    values = anomaly_metrics(df)
+    keys = [df[col] for col in peer_group]
+    grouped = values.groupby(keys, dropna=False)
+
+    median = grouped.transform('median')
+    q1 = grouped.transform('quantile', 0.25)
+    q3 = grouped.transform('quantile', 0.75)
+    mad = (values - median).abs().groupby(keys, dropna=False).transform('median')
+    peers = grouped['ContractCost'].transform('size')
+
+    z = 0.6745 * (values - median) / mad.where(mad > 0)
+    z = z.where(peers >= min_peers, axis=0)
+    iqr = q3 - q1
+    outside = (values > q3 + IQR_FENCE * iqr) | (values < q1 - IQR_FENCE * iqr)
+    outside = outside & (peers >= min_peers).to_numpy()[:, None]
+
+    scores = pd.DataFrame({'CostPerDay': values['CostPerDay']}, index=df.index)
+    for metric in ANOMALY_METRICS:
+        scores[f'{metric}Z'] = z[metric]
+        scores[f'{metric}IQR'] = outside[metric]
+    scores['AnomalyScore'] = z.abs().max(axis=1, skipna=True)
+    scores['IsAnomaly'] = scores['AnomalyScore'] > ANOMALY_THRESHOLD
+    return scores
+
+
+def isolation_forest_scores(df, random_state=42):
+    """Isolation Forest outlier score per project (higher is more anomalous)"""
+    values = anomaly_metrics(df)
+    features = pd.DataFrame({
+        'LogCost': np.log1p(values['ContractCost'].clip(lower=0)),
+        'LogCostPerDay': np.log1p(values['CostPerDay'].clip(lower=0)),
+        'BudgetVariance': values['BudgetVariance'],
+    })
+    features = features.fillna(features.median())
+    if len(features) < 10:
+        return pd.Series(np.nan, index=df.index, name='IsolationScore')
+    model = IsolationForest(n_estimators=200, random_state=random_state, n_jobs=-1)
+    model.fit(features)
+    return pd.Series(-model.score_samples(features), index=df.index, name='IsolationScore')
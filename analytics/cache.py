@@ -0,0 +1,217 @@
+"""Pluggable result cache for the analytics hot paths.
+
+`cached(name)` memoizes a function in the configured backend. As with
+Streamlit's caches, parameters whose name starts with an underscore are not
+part of the key: pass an explicit version string (see frame_version) next to
+the frame instead. Keyed arguments must be None, str, bytes, numbers, tuples
+or frozen dataclasses of those, NumPy arrays or pandas objects; anything else
+raises TypeError rather than risk two arguments sharing a key.
+
+The backend is a MemoryCache unless FLOODGATE_CACHE=disk, in which case
+results are pickled under FLOODGATE_CACHE_DIR. Frame-sized results are
+declared with persist=False and always stay in this process's memory, so
+every caller shares one copy whatever the backend.
+"""
+import dataclasses
+import hashlib
+import inspect
+import numbers
+import os
+import pickle
+import threading
+import weakref
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+CACHE_DIR = os.environ.get("FLOODGATE_CACHE_DIR", "data/cache")
+
+
+class MemoryCache:
+    """In-process LRU cache; values are shared, not copied, so treat them as read-only"""
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def get(self, name: str, key: str) -> Tuple[bool, Any]:
+        with self._lock:
+            entries = self._entries.get(name)
+            if entries is None or key not in entries:
+                return False, None
+            entries.move_to_end(key)
+            return True, entries[key]
+
+    def set(self, name: str, key: str, value: Any, max_entries: Optional[int] = None) -> None:
+        with self._lock:
+            entries = self._entries.setdefault(name, OrderedDict())
+            entries[key] = value
+            entries.move_to_end(key)
+            while len(entries) > (max_entries or self.max_entries):
+                entries.popitem(last=False)
+
+    def clear(self, name: Optional[str] = None) -> None:
+        with self._lock:
+            if name is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(name, None)
+
+
+class DiskCache:
+    """Pickles results under `directory/<name>/`, so they survive restarts and are shared by processes.
+
+    Values read or written by this process are also kept in a small in-memory
+    LRU, so repeated gets return the same object instead of unpickling a copy.
+    """
+
+    def __init__(self, directory: str = CACHE_DIR, max_entries: int = 64, memory_entries: int = 8):
+        self.directory = directory
+        self.max_entries = max_entries
+        self._recent = MemoryCache(memory_entries)
+
+    def _path(self, name, key):
+        return os.path.join(self.directory, name, f"{key}.pkl")
+
+    def get(self, name: str, key: str) -> Tuple[bool, Any]:
+        hit, value = self._recent.get(name, key)
+        if hit:
+            return hit, value
+        try:
+            with open(self._path(name, key), "rb") as f:
+                value = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return False, None
+        self._recent.set(name, key, value)
+        return True, value
+
+    def set(self, name: str, key: str, value: Any, max_entries: Optional[int] = None) -> None:
+        path = self._path(name, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        self._recent.set(name, key, value)
+        self._prune(name, max_entries or self.max_entries)
+
+    def _prune(self, name, max_entries):
+        directory = os.path.join(self.directory, name)
+        files = [os.path.join(directory, f) for f in os.listdir(directory) if f.endswith(".pkl")]
+        if len(files) <= max_entries:
+            return
+        for path in sorted(files, key=os.path.getmtime)[:len(files) - max_entries]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def clear(self, name: Optional[str] = None) -> None:
+        self._recent.clear(name)
+        names = [name] if name else os.listdir(self.directory) if os.path.isdir(self.directory) else []
+        for entry in names:
+            directory = os.path.join(self.directory, entry)
+            if not os.path.isdir(directory):
+                continue
+            for f in os.listdir(directory):
+                os.remove(os.path.join(directory, f))
+
+
+def _default_backend():
+    if os.environ.get("FLOODGATE_CACHE", "memory").lower() == "disk":
+        return DiskCache()
+    return MemoryCache()
+
+
+_backend = _default_backend()
+# Results declared with persist=False: process-local whatever the backend
+_memory = MemoryCache()
+_key_locks_guard = threading.Lock()
+# Locks live only while some caller holds them
+_key_locks = weakref.WeakValueDictionary()
+
+
+def get_cache() -> Union[MemoryCache, DiskCache]:
+    return _backend
+
+
+def configure_cache(backend: Union[MemoryCache, DiskCache]) -> Union[MemoryCache, DiskCache]:
+    """Swaps the backend used by every persisted cached function, e.g. configure_cache(DiskCache("/tmp/fg"))"""
+    global _backend
+    _backend = backend
+    return backend
+
+
+def _key_lock(name, key):
+    with _key_locks_guard:
+        lock = _key_locks.get((name, key))
+        if lock is None:
+            lock = _key_locks[(name, key)] = threading.Lock()
+        return lock
+
+
+def _key_part(value):
+    """Exact, deterministic encoding of one keyed argument (content hashes for arrays and frames)"""
+    if value is None or isinstance(value, (str, bytes, bool, numbers.Number)):
+        return f"{type(value).__name__}:{value!r}"
+    if isinstance(value, tuple):
+        return "(" + ",".join(_key_part(item) for item in value) + ")"
+    if dataclasses.is_dataclass(value) and not isinstance(value, type) and value.__dataclass_params__.frozen:
+        fields = ",".join(f"{f.name}={_key_part(getattr(value, f.name))}" for f in dataclasses.fields(value))
+        return f"{type(value).__qualname__}({fields})"
+    if isinstance(value, np.ndarray):
+        digest = hashlib.blake2b(np.ascontiguousarray(value).tobytes(), digest_size=16).hexdigest()
+        return f"ndarray:{value.dtype}:{value.shape}:{digest}"
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        hashes = pd.util.hash_pandas_object(value, index=True).to_numpy()
+        digest = hashlib.blake2b(hashes.tobytes(), digest_size=16).hexdigest()
+        columns = _key_part(tuple(map(str, value.columns))) if isinstance(value, pd.DataFrame) else repr(value.name)
+        return f"{type(value).__name__}:{columns}:{digest}"
+    raise TypeError(f"cannot use {type(value).__name__} as a cache key; pass a version string "
+                    f"or prefix the parameter with an underscore")
+
+
+def cached(name: str, max_entries: Optional[int] = None, persist: bool = True) -> Callable[[Callable], Callable]:
+    """Memoizes the decorated function under `name` in the configured backend.
+
+    With persist=False the results stay in process memory even under
+    DiskCache: use it for frames and other values too large to unpickle per call.
+
+    Concurrent callers asking for the same key wait for one computation.
+    The wrapper gets a `clear()` method that drops this function's entries.
+    """
+    def decorator(fn):
+        signature = inspect.signature(fn)
+
+        def make_key(args, kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            keyed = ";".join(f"{k}={_key_part(v)}" for k, v in bound.arguments.items() if not k.startswith("_"))
+            return hashlib.blake2b(keyed.encode(), digest_size=16).hexdigest()
+
+        def store():
+            return _backend if persist else _memory
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = make_key(args, kwargs)
+            backend = store()
+            hit, value = backend.get(name, key)
+            if hit:
+                return value
+            lock = _key_lock(name, key)
+            with lock:
+                hit, value = backend.get(name, key)
+                if hit:
+                    return value
+                value = fn(*args, **kwargs)
+                backend.set(name, key, value, max_entries)
+                return value
+
+        wrapper.clear = lambda: store().clear(name)
+        return wrapper
+    return decorator
@@ -0,0 +1,99 @@
+"""Plotly figures for the exploration and analysis pages. Each returns None when there is nothing to plot."""
+import plotly.express as px
+
+from analytics.timeseries import top_groups
+
+
+def island_fig(df, chart_type):
+    island_counts = df['MainIsland'].value_counts().reset_index()
+    island_counts.columns = ['MainIsland', 'Count']
+    if island_counts.empty: return None
+
+    if chart_type == "Donut Chart":
+        fig = px.pie(island_counts, values='Count', names='MainIsland', hole=0.4,
+                     color_discrete_sequence=px.colors.qualitative.Prism)
+    else:
+        fig = px.bar(island_counts, x='MainIsland', y='Count', color='Count',
+                     color_continuous_scale='Viridis')
+    fig.update_layout(margin=dict(t=10, b=0, l=0, r=0), height=350)
+    return fig
+
+
+def region_fig(df, top_n):
+    region_counts = df['Region'].value_counts().reset_index().head(top_n)
+    region_counts.columns = ['Region', 'Count']
+    if region_counts.empty: return None
+    dynamic_height = 150 + (len(region_counts) * 25)
+    fig = px.bar(region_counts, x='Count', y='Region', orientation='h',
+                 text='Count', color='Count', color_continuous_scale='Blues')
+    fig.update_layout(yaxis={'categoryorder':'total ascending'}, margin=dict(t=10, b=0, l=0, r=0), height=dynamic_height)
+    return fig
+
+
+def cost_hist_fig(df, dist_type, bin_count, use_log):
+    if df.empty: return None
+    if dist_type == "Contract Cost":
+        fig = px.histogram(df, x="ContractCost", nbins=bin_count, title="Distribution of Contract Costs")
+    else:
+        fig = px.histogram(df, x="ApprovedBudgetForContract", nbins=bin_count, title="Distribution of Approved Budgets")
+    if use_log:
+        fig.update_layout(yaxis_type="log")
+    fig.update_layout(bargap=0.1, margin=dict(t=30, b=0, l=0, r=0))
+    return fig
+
+
+def project_type_fig(df, chart_type):
+    tow_counts = df['TypeOfWork'].value_counts().reset_index().head(10)
+    tow_counts.columns = ['TypeOfWork', 'Count']
+    if tow_counts.empty: return None
+    dynamic_height = 400
+    if chart_type == "Bar Chart":
+        dynamic_height = 150 + (len(tow_counts) * 30)
+        fig = px.bar(tow_counts, x='TypeOfWork', y='Count', color='TypeOfWork', title="Top 10 Project Types by Volume")
+        fig.update_layout(showlegend=False, xaxis_tickangle=-45)
+    else:
+        fig = px.pie(tow_counts, values='Count', names='TypeOfWork', title="Top 10 Project Types by Volume")
+    fig.update_layout(height=dynamic_height)
+    return fig
+
+
+def contractor_figs(df):
+    con_val = df.groupby('Contractor')['ContractCost'].sum().sort_values(ascending=False).head(20).reset_index()
+    dynamic_height = 150 + (20 * 25)
+    if not con_val.empty:
+        fig_val = px.bar(con_val, x='ContractCost', y='Contractor', orientation='h',
+                         title=f"Top {20} Contractors by Value",
+                         text_auto='.2s', color='ContractCost', color_continuous_scale='Viridis')
+        fig_val.update_layout(yaxis={'categoryorder':'total ascending'}, height=dynamic_height)
+    else:
+        fig_val = None
+
+    con_count = df['Contractor'].value_counts().head(20).rename_axis('Contractor').reset_index(name='Count')
+    if not con_count.empty:
+        fig_vol = px.bar(con_count, x='Count', y='Contractor', orientation='h',
+                         title=f"Top {20} Contractors by Volume",
+                         text_auto=True, color='Count', color_continuous_scale='Inferno')
+        fig_vol.update_layout(yaxis={'categoryorder':'total ascending'}, height=dynamic_height)
+    else:
+        fig_vol = None
+    return fig_val, fig_vol
+
+
+def cost_driver_fig(importances):
+    if importances.empty: return None
+    fig = px.bar(importances, x='Importance', y='Attribute', orientation='h',
+                 text_auto='.2f', color='Importance', color_continuous_scale='Teal',
+                 title="Attribute Importance (Gradient Boosting)")
+    fig.update_layout(yaxis={'categoryorder':'total ascending'}, height=150 + len(importances) * 35)
+    return fig
+
+
+def trend_fig(rollup, metric, metric_label, top_n=8):
+    if rollup.empty: return None
+    grouped = rollup['Group'].nunique() > 1
+    if grouped:
+        rollup = rollup[rollup['Group'].isin(top_groups(rollup, top_n))]
+    fig = px.line(rollup, x='Period', y=metric, color='Group' if grouped else None, markers=True,
+                  labels={metric: metric_label, 'Period': ''})
+    fig.update_layout(margin=dict(t=10, b=0, l=0, r=0), height=400, legend_title_text='')
+    return fig
@@ -0,0 +1,305 @@
+"""The typed project dataset: raw CSV -> cleaned Parquet snapshot, plus its quality report.
+
+Nothing here touches Streamlit; failures raise (FileNotFoundError, ValueError)
+and the caller decides how to surface them.
+"""
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+logger = logging.getLogger(__name__)
+
+_snapshot_lock = threading.Lock()
+
+DATA_PATH = "data/dpwh_flood_control_projects.csv"
+SNAPSHOT_PATH = "data/dpwh_snapshot.parquet"
+PROFILE_PATH = "data/dpwh_snapshot.profile.json"
+# Bump whenever clean_data changes the snapshot's columns or types
+PIPELINE_VERSION = 4
+EXCLUDED_YEARS = [2018, 2019, 2020, 2021, 2025]
+PH_LATITUDE_RANGE = (4.0, 21.5)
+PH_LONGITUDE_RANGE = (116.0, 127.0)
+
+# The streaming loader reads every column as text, so one malformed value
+# cannot abort the snapshot: clean_data coerces the numeric columns and counts
+# what fails. Money columns also contain thousands separators.
+RAW_COLUMNS = [
+    'MainIsland', 'Region', 'Province', 'LegislativeDistrict', 'Municipality', 'DistrictEngineeringOffice',
+    'ProjectId', 'ProjectName', 'TypeOfWork', 'FundingYear', 'ContractId', 'ApprovedBudgetForContract',
+    'ContractCost', 'ActualCompletionDate', 'Contractor', 'ContractorCount', 'StartDate',
+    'ProjectLatitude', 'ProjectLongitude', 'ProvincialCapital', 'ProvincialCapitalLatitude',
+    'ProvincialCapitalLongitude',
+]
+RAW_DTYPES = dict.fromkeys(RAW_COLUMNS, str)
+NUMERIC_COLUMNS = [
+    'ContractorCount', 'ProjectLatitude', 'ProjectLongitude', 'ProvincialCapitalLatitude',
+    'ProvincialCapitalLongitude',
+]
+# Rows pandas looks at to infer the types shown as the raw CSV's structure
+DTYPE_SAMPLE_ROWS = 10_000
+
+
+def load_raw(csv_path=DATA_PATH):
+    """The raw CSV as published, without any cleaning"""
+    return pd.read_csv(csv_path)
+
+
+def read_raw_page(page, size, csv_path=DATA_PATH):
+    """Rows of the raw CSV on `page` (1-based) of `size` rows, read chunk by chunk; empty past the end"""
+    with pd.read_csv(csv_path, chunksize=size, dtype=RAW_DTYPES) as reader:
+        for number, chunk in enumerate(reader, start=1):
+            if number == page:
+                return chunk
+    return pd.DataFrame(columns=RAW_COLUMNS)
+
+
+def infer_raw_dtypes(csv_path=DATA_PATH, sample_rows=DTYPE_SAMPLE_ROWS):
+    """Column types pandas infers for the raw CSV, from its first `sample_rows` rows"""
+    return pd.read_csv(csv_path, nrows=sample_rows).dtypes.astype(str).to_dict()
+
+
+def file_version(path):
+    """Size and modification time of a file; changes whenever it is rewritten"""
+    stat = os.stat(path)
+    return f"{stat.st_size:x}-{stat.st_mtime_ns:x}"
+
+
+def dataset_version(snapshot_path=SNAPSHOT_PATH):
+    """Identifies the current snapshot; changes whenever it is rebuilt"""
+    return file_version(snapshot_path)
+
+
+def snapshot_is_fresh(csv_path=DATA_PATH, snapshot_path=SNAPSHOT_PATH, profile_path=PROFILE_PATH):
+    """True if the snapshot was built by the current pipeline and is newer than the raw CSV"""
+    if not os.path.exists(snapshot_path) or not os.path.exists(profile_path):
+        return False
+    try:
+        with open(profile_path) as f:
+            if json.load(f).get("pipeline_version") != PIPELINE_VERSION:
+                return False
+    except (OSError, ValueError):
+        return False
+    return not os.path.exists(csv_path) or os.path.getmtime(snapshot_path) >= os.path.getmtime(csv_path)
+
+
+def _log_progress(fraction, rows):
+    logger.info("Building snapshot: %.0f%% (%d raw rows)", fraction * 100, rows)
+
+
+@contextmanager
+def _file_lock(path):
+    with open(path, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def ensure_snapshot(on_progress=_log_progress, csv_path=DATA_PATH, snapshot_path=SNAPSHOT_PATH,
+                    profile_path=PROFILE_PATH):
+    """Rebuilds the snapshot if it is missing or stale; returns the rows written (0 if it was fresh).
+
+    Only one thread per process and one process per host builds at a time;
+    the others wait and then find the snapshot fresh.
+    """
+    if snapshot_is_fresh(csv_path, snapshot_path, profile_path):
+        return 0
+    with _snapshot_lock, _file_lock(f"{snapshot_path}.lock"):
+        if snapshot_is_fresh(csv_path, snapshot_path, profile_path):
+            return 0
+        return build_snapshot(csv_path, snapshot_path, on_progress=on_progress, profile_path=profile_path)
+
+
+def stream_clean_data(csv_path=DATA_PATH, chunksize=50_000, on_progress=None, report=None):
+    """Reads the raw CSV in chunks and yields each chunk already cleaned.
+
+    Peak memory is bounded by `chunksize` rather than the file size.
+    `on_progress(fraction, rows_read)` is called after every chunk and
+    `report` (see new_quality_report) is filled in as chunks are cleaned.
+    """
+    total_bytes = os.path.getsize(csv_path) or 1
+    rows_read = 0
+    if report is not None and not report["raw_dtypes"]:
+        report["raw_dtypes"] = infer_raw_dtypes(csv_path)
+    with open(csv_path, 'rb') as f:
+        for chunk in pd.read_csv(f, chunksize=chunksize, dtype=RAW_DTYPES):
+            rows_read += len(chunk)
+            cleaned = clean_data(chunk, report)
+            if on_progress:
+                on_progress(min(f.tell() / total_bytes, 1.0), rows_read)
+            yield cleaned
+
+
+def build_snapshot(csv_path=DATA_PATH, snapshot_path=SNAPSHOT_PATH, chunksize=50_000, on_progress=None,
+                   profile_path=PROFILE_PATH):
+    """Streams the raw CSV through clean_data into a columnar Parquet snapshot.
+
+    The data quality report gathered on the way is written to `profile_path`.
+    Returns the number of rows written.
+    """
+    tmp_path = f"{snapshot_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    writer, rows_written = None, 0
+    report = new_quality_report()
+    try:
+        for cleaned in stream_clean_data(csv_path, chunksize, on_progress, report):
+            if cleaned.empty:
+                continue
+            table = pa.Table.from_pandas(cleaned, preserve_index=False)
+            if writer is None:
+                # Columns that are entirely empty in the first chunk are typed as text
+                schema = pa.schema([
+                    field.with_type(pa.string()) if pa.types.is_null(field.type) else field
+                    for field in table.schema
+                ]).with_metadata(table.schema.metadata)
+                writer = pq.ParquetWriter(tmp_path, schema)
+            writer.write_table(table.cast(writer.schema))
+            rows_written += len(cleaned)
+    except BaseException:
+        if writer is not None:
+            writer.close()
+            os.remove(tmp_path)
+        raise
+    if writer is None:
+        raise ValueError(f"No usable rows in '{csv_path}'.")
+    writer.close()
+    # The profile goes first: until the snapshot is replaced too, readers still see it as stale
+    profile_tmp = f"{profile_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(profile_tmp, "w") as f:
+        json.dump(finish_quality_report(report), f, indent=2)
+    os.replace(profile_tmp, profile_path)
+    os.replace(tmp_path, snapshot_path)
+    return rows_written
+
+
+def read_quality_report(profile_path=PROFILE_PATH):
+    """Data quality report written next to the snapshot by build_snapshot"""
+    with open(profile_path) as f:
+        return json.load(f)
+
+
+def _tally(report, section, key, n):
+    if report is not None and n:
+        report[section][str(key)] = report[section].get(str(key), 0) + int(n)
+
+
+def new_quality_report():
+    """Empty data quality report, filled in by clean_data as rows stream through"""
+    return {
+        "raw_rows": 0, "clean_rows": 0, "raw_columns": [], "clean_columns": [], "raw_dtypes": {},
+        "raw_budget_sum": 0.0, "raw_budget_count": 0,
+        "nulls": {}, "coercion_failures": {}, "dropped": {}, "excluded_years": {},
+        "out_of_range_coordinates": 0, "duplicate_ids": 0, "_seen_ids": set(),
+        "pipeline_version": PIPELINE_VERSION,
+    }
+
+
+def finish_quality_report(report):
+    """Drops the pipeline-only state so the report can be stored as JSON"""
+    report.pop("_seen_ids", None)
+    return report
+
+
+def clean_data(data, report=None):
+    """Cleans raw rows; if `report` is given, quality counts are tallied on the way"""
+
+    if data.empty: return data
+    clean = data.copy()
+
+    for col in NUMERIC_COLUMNS:
+        if col in clean.columns:
+            present = clean[col].notna()
+            clean[col] = pd.to_numeric(clean[col], errors='coerce').astype('float64')
+            _tally(report, "coercion_failures", col, (present & clean[col].isna()).sum())
+
+    if report is not None:
+        report["raw_rows"] += len(clean)
+        report["raw_columns"] = report["raw_columns"] or list(clean.columns)
+        for col, n in clean.isnull().sum().items():
+            _tally(report, "nulls", col, n)
+        if 'ProjectId' in clean.columns:
+            ids = clean['ProjectId'].dropna()
+            seen = report["_seen_ids"]
+            report["duplicate_ids"] += int(ids.duplicated().sum() + ids.drop_duplicates().isin(seen).sum())
+            seen.update(ids)
+        lat, lon = clean['ProjectLatitude'], clean['ProjectLongitude']
+        report["out_of_range_coordinates"] += int((
+            lat.notna() & lon.notna() &
+            ~(lat.between(*PH_LATITUDE_RANGE) & lon.between(*PH_LONGITUDE_RANGE))
+        ).sum())
+
+    cols_to_clean = ['ContractCost', 'ApprovedBudgetForContract']
+    for col in cols_to_clean:
+        if col in clean.columns:
+            present = clean[col].notna()
+            if clean[col].dtype == 'object':
+                clean[col] = clean[col].astype(str).str.replace(',', '', regex=True)
+            clean[col] = pd.to_numeric(clean[col], errors='coerce')
+            _tally(report, "coercion_failures", col, (present & clean[col].isna()).sum())
+    if report is not None:
+        # Over every raw row, before any are dropped
+        report["raw_budget_sum"] += float(clean['ApprovedBudgetForContract'].sum())
+        report["raw_budget_count"] += int(clean['ApprovedBudgetForContract'].count())
+
+    rows = len(clean)
+    clean = clean.dropna(subset=['ContractCost', 'ApprovedBudgetForContract'])
+    _tally(report, "dropped", "Missing financials", rows - len(clean))
+
+    for col in ['StartDate', 'ActualCompletionDate']:
+        present = clean[col].notna()
+        clean[col] = pd.to_datetime(clean[col], errors='coerce')
+        _tally(report, "coercion_failures", col, (present & clean[col].isna()).sum())
+
+    clean['Duration'] = (clean['ActualCompletionDate'] - clean['StartDate']).dt.days
+
+    present = clean['FundingYear'].notna()
+    clean['FundingYear'] = pd.to_numeric(clean['FundingYear'], errors='coerce')
+    _tally(report, "coercion_failures", 'FundingYear', (present & clean['FundingYear'].isna()).sum())
+    excluded = clean['FundingYear'].isin(EXCLUDED_YEARS)
+    if report is not None:
+        for year, n in clean.loc[excluded, 'FundingYear'].value_counts().items():
+            _tally(report, "excluded_years", int(year), n)
+        _tally(report, "dropped", "Excluded funding years", excluded.sum())
+    clean = clean.loc[~excluded]
+
+    clean['BudgetDifference'] = clean['ApprovedBudgetForContract'] - clean['ContractCost']
+    clean['BudgetVariance'] = (clean['BudgetDifference'] / clean['ApprovedBudgetForContract']) * 100
+    clean['RiskScore'] = (clean['ContractCost'] / clean['ApprovedBudgetForContract'])
+    clean['IsSuspicious'] = clean['RiskScore'] > 0.99
+
+    col_map = {'ProjectLatitude': 'latitude', 'ProjectLongitude': 'longitude'}
+    clean = clean.rename(columns=col_map)
+    rows = len(clean)
+    clean = clean.dropna(subset=['latitude', 'longitude'])
+
+    if report is not None:
+        _tally(report, "dropped", "Missing coordinates", rows - len(clean))
+        report["clean_rows"] += len(clean)
+        report["clean_columns"] = report["clean_columns"] or list(clean.columns)
+
+    return clean
+
+
+def version_of(df):
+    """Dataset version a frame was derived from (stamped by load_dataset, kept through filtering)"""
+    return df.attrs.get("dataset_version", "")
+
+
+def frame_version(df):
+    """Cheap fingerprint of a frame's rows and dataset version, used to key caches of derived data.
+
+    The snapshot has a RangeIndex, so the index alone would not change when a
+    rebuilt dataset happens to keep its row count.
+    """
+    digest = hashlib.blake2b(df.index.to_numpy().tobytes(), digest_size=16)
+    digest.update(",".join(map(str, df.columns)).encode())
+    digest.update(version_of(df).encode())
+    return f"{len(df)}-{digest.hexdigest()}"
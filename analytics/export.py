@@ -0,0 +1,161 @@
+import json
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Under the app's static folder, so Streamlit's static file route streams
+# finished exports to the browser instead of a session holding them in memory
+EXPORT_DIR = "static/exports"
+# Exports unused for longer than this are deleted, and the oldest go first once
+# the folder is over the size limit (Streamlit stops static serving above 1 GB)
+EXPORT_MAX_AGE = 60 * 60
+EXPORT_MAX_BYTES = 512 * 1024 * 1024
+EXPORT_FORMATS = {
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+    "CSV": ("csv", "text/csv"),
+    "GeoJSON": ("geojson", "application/geo+json"),
+}
+
+_lock = threading.Lock()
+_pending = {}
+
+
+def export_path(fingerprint, fmt, export_dir=EXPORT_DIR):
+    extension, _ = EXPORT_FORMATS[fmt]
+    return os.path.join(export_dir, f"floodgate-{fingerprint}.{extension}")
+
+
+def _chunks(df, chunksize):
+    for start in range(0, len(df), chunksize):
+        yield df.iloc[start:start + chunksize]
+
+
+def write_csv(df, path, chunksize=5_000):
+    with open(path, "w", newline="") as f:
+        for i, chunk in enumerate(_chunks(df, chunksize)):
+            chunk.to_csv(f, index=False, header=(i == 0))
+
+
+def write_parquet(df, path, chunksize=5_000):
+    writer = None
+    try:
+        for chunk in _chunks(df, chunksize):
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table.cast(writer.schema))
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def _json_value(value):
+    if value is pd.NaT:
+        return None
+    if isinstance(value, (pd.Timestamp, np.datetime64)):
+        return None if pd.isna(value) else pd.Timestamp(value).isoformat()
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not np.isfinite(value):
+        return None
+    return value
+
+
+def write_geojson(df, path, chunksize=5_000):
+    """Point features (longitude, latitude) with every other column as properties"""
+    properties = [col for col in df.columns if col not in ('latitude', 'longitude')]
+    with open(path, "w") as f:
+        f.write('{"type": "FeatureCollection", "features": [\n')
+        first = True
+        for chunk in _chunks(df, chunksize):
+            coords = zip(chunk['longitude'].to_numpy(), chunk['latitude'].to_numpy())
+            rows = chunk[properties].itertuples(index=False, name=None)
+            for (lon, lat), row in zip(coords, rows):
+                feature = {
+                    "type": "Feature",
+                    "geometry": {"type": "Point", "coordinates": [float(lon), float(lat)]},
+                    "properties": {col: _json_value(value) for col, value in zip(properties, row)},
+                }
+                f.write(("" if first else ",\n") + json.dumps(feature, default=str))
+                first = False
+        f.write("\n]}\n")
+
+
+WRITERS = {"Parquet": write_parquet, "CSV": write_csv, "GeoJSON": write_geojson}
+
+
+def prune_exports(export_dir=EXPORT_DIR, max_age=EXPORT_MAX_AGE, max_bytes=EXPORT_MAX_BYTES, keep=()):
+    """Deletes exports unused for `max_age` seconds, then the least recently used beyond `max_bytes`.
+
+    Files in `keep` are never deleted. Returns the number of files removed.
+    """
+    try:
+        names = os.listdir(export_dir)
+    except FileNotFoundError:
+        return 0
+    files = []
+    for name in names:
+        path = os.path.join(export_dir, name)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        files.append((stat.st_mtime, stat.st_size, path))
+
+    now, removed = time.time(), 0
+    total = sum(size for _, size, _ in files)
+    for mtime, size, path in sorted(files):
+        # Temp files of running writers are only removed once they are stale
+        if path in keep or (path.endswith(".tmp") and now - mtime < max_age):
+            continue
+        if now - mtime < max_age and total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+        removed += 1
+    return removed
+
+
+def export_frame(df, fmt, fingerprint, export_dir=EXPORT_DIR):
+    """Writes `df` in `fmt` chunk by chunk and returns the file path.
+
+    Files are named by fingerprint, so an identical export is served from disk;
+    reusing a file marks it as recently used for prune_exports.
+    """
+    path = export_path(fingerprint, fmt, export_dir)
+    if os.path.exists(path):
+        os.utime(path)
+        return path
+    os.makedirs(export_dir, exist_ok=True)
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    try:
+        WRITERS[fmt](df, tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    prune_exports(export_dir, keep=(path,))
+    return path
+
+
+def submit_export(executor, df, fmt, fingerprint, export_dir=EXPORT_DIR):
+    """Runs export_frame on `executor`; concurrent requests for the same file share one future.
+
+    Only exports still being written are tracked: finished ones are found on disk.
+    """
+    path = export_path(fingerprint, fmt, export_dir)
+    with _lock:
+        for done in [p for p, f in _pending.items() if f.done()]:
+            del _pending[done]
+        future = _pending.get(path)
+        if future is None:
+            future = _pending[path] = executor.submit(export_frame, df, fmt, fingerprint, export_dir)
+        return future
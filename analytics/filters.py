@@ -0,0 +1,65 @@
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass(frozen=True)
+class Filters:
+    """Sidebar selections; empty or None fields do not filter. Hashable, so usable as a cache key."""
+    search_term: str = ""
+    search_id: str = ""
+    regions: Tuple[str, ...] = ()
+    provinces: Tuple[str, ...] = ()
+    works: Tuple[str, ...] = ()
+    years: Optional[Tuple[int, int]] = None
+    min_anomaly_score: Optional[float] = None
+
+
+def filter_mask(df: pd.DataFrame, filters: Filters) -> np.ndarray:
+    """Boolean numpy mask of the rows matching the filters (no frame copies)"""
+    mask = np.ones(len(df), dtype=bool)
+
+    if filters.search_term:
+        mask &= df['ProjectName'].str.contains(filters.search_term, case=False, na=False).to_numpy()
+    if filters.search_id:
+        mask &= df['ProjectId'].astype(str).str.contains(filters.search_id, case=False, na=False).to_numpy()
+    if filters.regions:
+        mask &= df['Region'].isin(filters.regions).to_numpy()
+    if filters.provinces:
+        mask &= df['Province'].isin(filters.provinces).to_numpy()
+    if filters.works:
+        mask &= df['TypeOfWork'].isin(filters.works).to_numpy()
+    if filters.years:
+        years = df['FundingYear'].to_numpy()
+        mask &= (years >= filters.years[0]) & (years <= filters.years[1])
+    if filters.min_anomaly_score:
+        mask &= (df['AnomalyScore'] >= filters.min_anomaly_score).to_numpy()
+    return mask
+
+
+def filter_positions(df: pd.DataFrame, filters: Filters) -> np.ndarray:
+    """Integer row positions matching the filters, for use with df.iloc / np.take"""
+    return np.flatnonzero(filter_mask(df, filters))
+
+
+def apply_filter(df: pd.DataFrame, filters: Filters) -> pd.DataFrame:
+    """Rows of `df` matching the filters, gathered by position; `df` itself when nothing is filtered out"""
+    positions = filter_positions(df, filters)
+    # No effective filter: hand back the shared frame itself instead of a copy
+    if len(positions) == len(df):
+        return df
+    return df.take(positions)
+
+
+def filter_options(df: pd.DataFrame) -> dict:
+    """Sorted choices for the filter widgets"""
+    years = None
+    if 'FundingYear' in df.columns:
+        years = (int(df['FundingYear'].min()), int(df['FundingYear'].max()))
+    return {
+        'regions': sorted(df['Region'].unique().tolist()),
+        'provinces': sorted(df['Province'].unique().tolist()),
+        'years': years,
+    }
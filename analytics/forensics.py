@@ -0,0 +1,156 @@
+# Forensic computations and their figures. Nothing here imports Streamlit or
+# pyplot, so the functions can run in worker processes and threads.
+import io
+
+import numpy as np
+import pandas as pd
+import seaborn as sns
+from matplotlib.figure import Figure
+from scipy.stats import gaussian_kde
+from sklearn.cluster import KMeans
+from sklearn.preprocessing import StandardScaler
+
+DIGITS = np.arange(1, 10)
+BENFORD_EXPECTED = np.log10(1 + 1 / DIGITS) * 100
+# Nigrini's first-digit MAD thresholds (in proportions)
+BENFORD_CONFORMITY = [(0.006, "Close"), (0.012, "Acceptable"), (0.015, "Marginal")]
+
+
+def first_digits(values):
+    """First significant digit of every positive, finite value"""
+    values = np.abs(np.asarray(values, dtype=float))
+    values = values[np.isfinite(values) & (values > 0)]
+    scaled = values / 10 ** np.floor(np.log10(values))
+    return np.floor(scaled + 1e-9).clip(1, 9).astype(int)
+
+
+def benford_frequencies(values):
+    """Observed first-digit frequencies (%) for digits 1-9, and the sample size"""
+    digits = first_digits(values)
+    if len(digits) == 0:
+        return None, 0
+    counts = np.bincount(digits, minlength=10)[1:]
+    return counts / counts.sum() * 100, int(counts.sum())
+
+
+def benford_mad(observed):
+    """Mean absolute deviation from Benford's distribution, in proportions"""
+    return float(np.mean(np.abs(observed - BENFORD_EXPECTED)) / 100)
+
+
+def benford_conformity(mad):
+    for threshold, label in BENFORD_CONFORMITY:
+        if mad <= threshold:
+            return label
+    return "Nonconformity"
+
+
+def bid_variance_distribution(variance, bins=50):
+    """Histogram and KDE curve of BudgetVariance inside the -5%..10% window"""
+    variance = np.asarray(variance, dtype=float)
+    zoom = variance[(variance > -5) & (variance < 10)]
+    counts, edges = np.histogram(zoom, bins=bins)
+    kde_x = kde_y = None
+    if len(zoom) > 1 and np.ptp(zoom) > 0:
+        kde_x = np.linspace(edges[0], edges[-1], 200)
+        # Scale the density to histogram counts, as seaborn's histplot(kde=True) does
+        kde_y = gaussian_kde(zoom)(kde_x) * len(zoom) * (edges[1] - edges[0])
+    return {"counts": counts, "edges": edges, "kde_x": kde_x, "kde_y": kde_y}
+
+
+def kmeans_clusters(cost, duration, n_clusters=4):
+    """K-Means labels on log cost and log duration; None if there are fewer than 10 projects"""
+    frame = pd.DataFrame({"ContractCost": cost, "Duration": duration}).dropna()
+    if len(frame) < 10:
+        return None
+    X_scaled = StandardScaler().fit_transform(np.log1p(frame[["ContractCost", "Duration"]]))
+    frame["Cluster"] = KMeans(n_clusters=n_clusters, random_state=42, n_init=10).fit_predict(X_scaled)
+    return frame
+
+
+def contractor_ranking(contractors, cost, n=20):
+    """Total contract value of the top `n` contractors"""
+    return pd.Series(cost).groupby(np.asarray(contractors)).sum().sort_values(ascending=False).head(n)
+
+
+def benford_figure(observed):
+    plot_data = pd.DataFrame({
+        'Digit': DIGITS,
+        'Observed': observed,
+        'Expected': BENFORD_EXPECTED,
+    }).melt(id_vars='Digit', var_name='Type', value_name='Frequency (%)')
+
+    fig = Figure(figsize=(10, 5))
+    ax = fig.subplots()
+    sns.barplot(data=plot_data, x='Digit', y='Frequency (%)', hue='Type', ax=ax, palette=['#1f77b4', '#ff7f0e'])
+    ax.set_title("Benford's Law Analysis (Fraud Detection)")
+    ax.set_ylabel("Frequency (%)")
+    ax.grid(axis='y', linestyle='--', alpha=0.7)
+    return fig
+
+
+def bid_variance_figure(dist):
+    fig = Figure(figsize=(10, 5))
+    ax = fig.subplots()
+    edges = dist["edges"]
+    ax.bar(edges[:-1], dist["counts"], width=np.diff(edges), align='edge', color='darkred', alpha=0.6, edgecolor='white')
+    if dist["kde_x"] is not None:
+        ax.plot(dist["kde_x"], dist["kde_y"], color='darkred')
+    ax.axvline(0, color='black', linestyle='--', label='Exact Budget Match')
+    ax.set_title("Bid Variance Distribution (Detection of Bid Rigging)")
+    ax.set_xlabel("Variance % (0 = Bid matched Budget exactly)")
+    ax.set_ylabel("Count")
+    ax.legend()
+    return fig
+
+
+def cluster_figure(cluster_data):
+    fig = Figure(figsize=(10, 6))
+    ax = fig.subplots()
+    sns.scatterplot(
+        data=cluster_data, x='Duration', y='ContractCost',
+        hue='Cluster', palette='viridis', style='Cluster', s=100, ax=ax
+    )
+    ax.set_xscale('log')
+    ax.set_yscale('log')
+    ax.set_title("Project Clusters: Cost vs. Duration (Anomaly Detection)")
+    ax.set_xlabel("Duration (Days) - Log Scale")
+    ax.set_ylabel("Contract Cost (PHP) - Log Scale")
+    return fig
+
+
+def contractor_figure(top):
+    fig = Figure(figsize=(14, 6))
+    ax = fig.subplots()
+    sns.barplot(y=top.index, x=top.values, palette='mako', ax=ax)
+    ax.set_xlabel("Total Contract Value (PHP)")
+    ax.set_title("Top 20 Contractors by Market Share")
+    return fig
+
+
+# Frame-level shortcuts for notebooks: compute and build the figure in one call
+def plot_benfords_law(df):
+    observed, _ = benford_frequencies(df['ContractCost'].to_numpy())
+    if observed is None: return None
+    return benford_figure(observed)
+
+
+def plot_clustering(df):
+    cluster_data = kmeans_clusters(df['ContractCost'].to_numpy(), df['Duration'].to_numpy())
+    if cluster_data is None: return None
+    return cluster_figure(cluster_data)
+
+
+def plot_bid_variance(df):
+    return bid_variance_figure(bid_variance_distribution(df['BudgetVariance'].to_numpy()))
+
+
+def plot_top_contractors(df):
+    return contractor_figure(contractor_ranking(df['Contractor'].to_numpy(), df['ContractCost'].to_numpy()))
+
+
+def figure_png(fig, dpi=150):
+    """Serializes a figure to PNG bytes"""
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', dpi=dpi, bbox_inches='tight')
+    return buffer.getvalue()
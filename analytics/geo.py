@@ -0,0 +1,158 @@
+import json
+import os
+import re
+
+import numpy as np
+
+# Simplified boundary files bundled with the app (see data/boundaries/README.md
+# for their sources). Features are matched on the name properties below.
+BOUNDARY_FILES = {
+    'Province': "data/boundaries/provinces.geojson",
+    'Municipality': "data/boundaries/municipalities.geojson",
+}
+# Sources and accuracy of the bundled outlines, shown next to the choropleth
+BOUNDARY_README = "data/boundaries/README.md"
+NAME_PROPERTIES = {
+    'Province': ['province', 'Province', 'ADM2_EN', 'NAME_1', 'name'],
+    'Municipality': ['municipality', 'Municipality', 'ADM3_EN', 'NAME_2', 'name'],
+}
+# Municipality names repeat across provinces, so they are joined on (province, municipality)
+JOIN_COLUMNS = {
+    'Province': ['Province'],
+    'Municipality': ['Province', 'Municipality'],
+}
+CHOROPLETH_METRICS = {
+    'Projects': 'Projects',
+    'Total Contract Cost': 'ContractCost',
+    'Suspicious Share (%)': 'SuspiciousShare',
+    'Cost per Project': 'CostPerProject',
+    'Cost Share vs. Project Share': 'CostShareRatio',
+}
+
+
+def normalize_name(name):
+    """Upper-cased name without 'City of', parentheses or punctuation, for joining"""
+    name = str(name).upper()
+    name = re.sub(r"\(.*?\)", " ", name)
+    name = re.sub(r"\bCITY OF\b|\bCITY\b", " ", name)
+    name = re.sub(r"[^A-Z0-9Ñ]+", " ", name)
+    return " ".join(name.split())
+
+
+def area_rollup(df, level):
+    """Per-province or per-municipality totals and ratios, indexed by join key.
+
+    CostShareRatio is the area's share of national contract cost divided by
+    its share of projects: above 1 means costlier projects than the national mix.
+    """
+    keys = [df[col].map(normalize_name) for col in JOIN_COLUMNS[level]]
+    rollup = df.groupby(keys).agg(
+        Projects=('ContractCost', 'size'),
+        ContractCost=('ContractCost', 'sum'),
+        SuspiciousProjects=('IsSuspicious', 'sum'),
+    )
+    if len(keys) > 1:
+        rollup.index = ["|".join(key) for key in rollup.index]
+    rollup['SuspiciousShare'] = rollup['SuspiciousProjects'] / rollup['Projects'] * 100
+    rollup['CostPerProject'] = rollup['ContractCost'] / rollup['Projects']
+    cost_share = rollup['ContractCost'] / rollup['ContractCost'].sum()
+    project_share = rollup['Projects'] / rollup['Projects'].sum()
+    rollup['CostShareRatio'] = cost_share / project_share
+    return rollup
+
+
+# Zoom levels the choropleth geometry is simplified for; a map zoomed to 7
+# uses the zoom-6 outlines, one zoomed to 12 the zoom-10 outlines
+DETAIL_ZOOMS = (6, 8, 10)
+
+
+def detail_zoom(zoom):
+    """The DETAIL_ZOOMS level whose outlines are drawn at `zoom`"""
+    return max([level for level in DETAIL_ZOOMS if level <= zoom] or [DETAIL_ZOOMS[0]])
+
+
+def tolerance_for_zoom(zoom):
+    """Simplification tolerance in degrees: about one screen pixel at this zoom level"""
+    return 360 / (256 * 2 ** int(zoom))
+
+
+def simplify_ring(coords, tolerance):
+    """Douglas-Peucker simplification of one ring, keeping it a valid closed ring"""
+    points = np.asarray(coords, dtype=float)
+    if len(points) <= 4 or tolerance <= 0:
+        return coords
+    keep = np.zeros(len(points), dtype=bool)
+    keep[[0, -1]] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end <= start + 1:
+            continue
+        segment = points[end] - points[start]
+        rel = points[start + 1:end] - points[start]
+        length = np.hypot(*segment)
+        if length == 0:
+            dist = np.hypot(rel[:, 0], rel[:, 1])
+        else:
+            dist = np.abs(segment[0] * rel[:, 1] - segment[1] * rel[:, 0]) / length
+        i = int(np.argmax(dist))
+        if dist[i] > tolerance:
+            split = start + 1 + i
+            keep[split] = True
+            stack.extend([(start, split), (split, end)])
+    simplified = points[keep]
+    if len(simplified) < 4:
+        return coords
+    return simplified.round(5).tolist()
+
+
+def simplify_geometry(geometry, tolerance):
+    """Simplifies every ring of a (Multi)Polygon; other geometry types pass through"""
+    if geometry['type'] == 'Polygon':
+        rings = [simplify_ring(ring, tolerance) for ring in geometry['coordinates']]
+    elif geometry['type'] == 'MultiPolygon':
+        rings = [[simplify_ring(ring, tolerance) for ring in polygon] for polygon in geometry['coordinates']]
+    else:
+        return geometry
+    return {'type': geometry['type'], 'coordinates': rings}
+
+
+def load_boundaries(level):
+    """The bundled boundary GeoJSON for a level, or None if it is not installed"""
+    path = BOUNDARY_FILES[level]
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def _property(properties, keys):
+    for key in keys:
+        if properties.get(key):
+            return properties[key]
+    return None
+
+
+def _feature_key(properties, level):
+    names = [_property(properties, NAME_PROPERTIES[col]) for col in JOIN_COLUMNS[level]]
+    if any(name is None for name in names):
+        return None
+    return "|".join(normalize_name(name) for name in names)
+
+
+def join_rollup(boundaries, rollup, level, tolerance):
+    """Simplified features carrying the rollup values as properties; unmatched areas are dropped"""
+    features = []
+    for feature in boundaries['features']:
+        key = _feature_key(feature.get('properties', {}), level)
+        if key not in rollup.index:
+            continue
+        values = rollup.loc[key]
+        properties = {'Name': _property(feature['properties'], NAME_PROPERTIES[level])}
+        properties.update({col: float(values[col]) for col in CHOROPLETH_METRICS.values()})
+        features.append({
+            'type': 'Feature',
+            'properties': properties,
+            'geometry': simplify_geometry(feature['geometry'], tolerance),
+        })
+    return {'type': 'FeatureCollection', 'features': features}
@@ -0,0 +1,169 @@
+"""Per-process timing, cache-miss and payload counters for the hot paths (Streamlit-free)."""
+import json
+import logging
+import os
+import resource
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+# Instrumentation is switched on per process with FLOODGATE_PROFILE=1.
+# When it is off the decorators hand back the original function untouched,
+# so the hot paths pay nothing.
+ENABLED = os.environ.get("FLOODGATE_PROFILE", "").lower() in ("1", "true", "yes", "on")
+PROM_FILE = os.environ.get("FLOODGATE_PROM_FILE")
+
+logger = logging.getLogger("floodgate.perf")
+
+_lock = threading.Lock()
+_stats = {}
+
+
+def rss_bytes():
+    """Current resident set size in bytes (peak RSS where /proc is unavailable)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _entry(name):
+    entry = _stats.get(name)
+    if entry is None:
+        entry = _stats[name] = {
+            "calls": 0, "misses": 0, "seconds": 0.0, "max_seconds": 0.0,
+            "compute_seconds": 0.0, "mem_delta_bytes": 0, "payload_bytes": 0,
+        }
+    return entry
+
+
+def _record(name, seconds, mem_delta):
+    with _lock:
+        entry = _entry(name)
+        entry["calls"] += 1
+        entry["seconds"] += seconds
+        entry["max_seconds"] = max(entry["max_seconds"], seconds)
+        entry["mem_delta_bytes"] += mem_delta
+    logger.debug(json.dumps({"event": "timing", "name": name, "seconds": round(seconds, 6), "mem_delta_bytes": mem_delta}))
+
+
+def timed(name):
+    """Times every call of the wrapped function (including cache lookups)"""
+    def decorator(fn):
+        if not ENABLED:
+            return fn
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            rss, start = rss_bytes(), time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _record(name, time.perf_counter() - start, rss_bytes() - rss)
+
+        if hasattr(fn, "clear"):
+            wrapper.clear = fn.clear
+        return wrapper
+    return decorator
+
+
+def cache_miss(name):
+    """Counts real executions; place it *inside* st.cache_data / st.cache_resource.
+
+    Together with an outer `timed(name)` this gives hits = calls - misses, and
+    seconds - compute_seconds is the time spent hashing and copying by the cache.
+    """
+    def decorator(fn):
+        if not ENABLED:
+            return fn
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                with _lock:
+                    entry = _entry(name)
+                    entry["misses"] += 1
+                    entry["compute_seconds"] += elapsed
+                logger.debug(json.dumps({"event": "cache_miss", "name": name, "seconds": round(elapsed, 6)}))
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def section(name):
+    """Times a block of page code, e.g. `with section("analysis.map"):`"""
+    if not ENABLED:
+        yield
+        return
+    rss, start = rss_bytes(), time.perf_counter()
+    try:
+        yield
+    finally:
+        _record(name, time.perf_counter() - start, rss_bytes() - rss)
+
+
+def record_payload(name, nbytes):
+    """Records the size of something shipped to the browser (last value wins)"""
+    if not ENABLED:
+        return
+    with _lock:
+        _entry(name)["payload_bytes"] = int(nbytes)
+    logger.debug(json.dumps({"event": "payload", "name": name, "bytes": int(nbytes)}))
+
+
+def snapshot():
+    """Returns a list of per-name metric rows, sorted by total time"""
+    with _lock:
+        rows = [{"name": name, **entry} for name, entry in _stats.items()]
+    for row in rows:
+        row["hits"] = max(row["calls"] - row["misses"], 0) if row["misses"] else None
+    return sorted(rows, key=lambda r: r["seconds"], reverse=True)
+
+
+def reset():
+    with _lock:
+        _stats.clear()
+
+
+def to_json_lines():
+    return "\n".join(json.dumps(row) for row in snapshot())
+
+
+def to_prometheus():
+    metrics = [
+        ("floodgate_calls_total", "counter", "Number of timed calls", "calls"),
+        ("floodgate_cache_misses_total", "counter", "Number of cache misses (real executions)", "misses"),
+        ("floodgate_seconds_total", "counter", "Total wall time in seconds", "seconds"),
+        ("floodgate_compute_seconds_total", "counter", "Wall time spent on cache misses in seconds", "compute_seconds"),
+        ("floodgate_max_seconds", "gauge", "Slowest single call in seconds", "max_seconds"),
+        ("floodgate_mem_delta_bytes_total", "counter", "Summed RSS delta across calls in bytes", "mem_delta_bytes"),
+        ("floodgate_payload_bytes", "gauge", "Last recorded payload size in bytes", "payload_bytes"),
+    ]
+    rows = snapshot()
+    lines = []
+    for metric, kind, help_text, field in metrics:
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} {kind}")
+        for row in rows:
+            lines.append(f'{metric}{{name="{row["name"]}"}} {row[field]}')
+    lines.append("# HELP floodgate_rss_bytes Resident set size of the worker in bytes")
+    lines.append("# TYPE floodgate_rss_bytes gauge")
+    lines.append(f"floodgate_rss_bytes {rss_bytes()}")
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(path=None):
+    """Writes the Prometheus text file atomically (node_exporter textfile style)"""
+    path = path or PROM_FILE
+    if not ENABLED or not path:
+        return
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        f.write(to_prometheus())
+    os.replace(tmp, path)
@@ -0,0 +1,108 @@
+"""Folium map builders: project markers and area choropleths."""
+import branca.colormap
+import branca.element
+import folium as fm
+import folium.plugins
+import numpy as np
+from folium import TileLayer
+
+from data.mapping_dicts import TypeOfWork_full_color
+
+
+def create_map(df, center, zoom, color_by=None):
+    """Project marker map; `color_by` names a numeric score column, otherwise markers use TypeOfWork colors"""
+    m = fm.Map(location=center, zoom_start=zoom, control_scale=True, prefer_canvas=True, tiles=None)
+    TileLayer(
+        tiles="https://controlmap.mgb.gov.ph/arcgis/rest/services/GeospatialDataInventory_Public/GDI_Detailed_Flood_Susceptibility_Public/MapServer/tile/{z}/{y}/{x}",
+        attr="MGB Flood Hazard", name="MGB Flood Susceptibility", overlay=True, control=True, show=False, opacity=0.5
+    ).add_to(m)
+    TileLayer(
+        tiles="https://controlmap.mgb.gov.ph/arcgis/rest/services/GeospatialDataInventory_Public/GDI_Detailed_Rain_induced_Landslide_Susceptibility_Public/MapServer/tile/{z}/{y}/{x}",
+        attr="MGB Rain/Landslide",
+        name="MGB Rain Induced Landslide Susceptibility",
+        overlay=True,
+        control=True,
+        show=False,
+        opacity=0.5
+    ).add_to(m)
+
+    TileLayer("Esri.WorldImagery", name="Satellite", show=True).add_to(m)
+    TileLayer("CartoDB.DarkMatter", name="Dark Mode", show=False).add_to(m)
+    TileLayer("OpenStreetMap", name="Street Map", show=False).add_to(m)
+
+    fm.plugins.Fullscreen(position="bottomleft", title="Expand me", title_cancel="Exit me", force_separate_button=True).add_to(m)
+    fg = fm.FeatureGroup(name="DPWH Projects (Markers)")
+
+    if not df.empty:
+        # Vectorized data extraction for speed
+        id, lats, lons = df['ProjectId'].values, df['latitude'].values, df['longitude'].values
+        names, regions, costs = df['ProjectName'].values, df['Region'].values, df['ContractCost'].values
+        startdates = df['StartDate'].dt.strftime('%B-%d-%Y').values
+        enddates = df['ActualCompletionDate'].dt.strftime('%B-%d-%Y').values
+        durations = df['Duration'].values
+        contractors, fundingyears = df['Contractor'].values, df['FundingYear'].values
+        legDist, Municipality, engDist = df['LegislativeDistrict'].values, df['Municipality'].values, df['DistrictEngineeringOffice'].values
+        risks, tow_vals = df['RiskScore'].values, df['TypeOfWork'].values
+
+        if color_by:
+            scores = df[color_by].to_numpy(dtype=float)
+            finite = scores[np.isfinite(scores)]
+            vmin, vmax = (np.percentile(finite, [1, 99]) if len(finite) else (0.0, 1.0))
+            cmap = branca.colormap.LinearColormap(['#ffffb2', '#fd8d3c', '#bd0026'], vmin=vmin, vmax=max(vmax, vmin + 1e-9))
+            cmap.caption = color_by
+            cmap.add_to(m)
+            colors = [cmap(min(max(v, vmin), vmax)) if np.isfinite(v) else '#808080' for v in scores]
+        else:
+            colors = [TypeOfWork_full_color.get(tow, 'blue') for tow in tow_vals]
+        anomaly_vals = df['AnomalyScore'].values if 'AnomalyScore' in df.columns else np.full(len(df), np.nan)
+
+        for pid, lat, lon, name, region, cost, start, end, dur, cont, fund, ld, mun, ed, risk, tow, color, anomaly in zip(id, lats, lons, names, regions, costs, startdates, enddates, durations, contractors, fundingyears, legDist, Municipality, engDist, risks, tow_vals, colors, anomaly_vals):
+            formatted_cost = f"₱{cost:,.2f}"
+            popup_html = f"""
+                        <div style="font-family: sans-serif; font-size: 12px; line-height: 1.4; color: #333;">
+                            <b style="font-size: 14px; color: #000;">{name}</b><br>
+                            <span style="color: #006400; font-weight: bold;">{formatted_cost}</span> &bull; {tow} &bull; FY {fund}
+                            <hr style="margin: 8px 0; border: 0; border-top: 1px solid #ccc;">
+                            <b>Loc:</b> {mun}, {ld} ({region})<br>
+                            <b>Eng:</b> {ed}<br>
+                            <b>Time:</b> {start} &ndash; {end} <i>({dur} days)</i><br>
+                            <b>By:</b> {cont}<br>
+                            <b>Risk Score: {risk:.2f} </b> &bull; <b>Anomaly Score: {anomaly:.2f}</b>
+                        </div>
+                    """
+            iframe = branca.element.IFrame(html=popup_html, width="520px", height="180px")
+            pp = fm.Popup(iframe, max_width=500)
+            mark = fm.CircleMarker(
+                location=[lat, lon], radius=3, fill=True, fill_opacity=0.7, tooltip=f"Project ID: {pid}", popup=pp,
+                fill_color=color, color=color
+            )
+            fg.add_child(mark)
+    fg.add_to(m)
+    fm.LayerControl(position='bottomleft').add_to(m)
+    return m
+
+
+def create_choropleth_map(geojson, metric, metric_label, center, zoom):
+    """Areas of a joined GeoJSON (see geo.join_rollup) shaded by one rollup metric"""
+    m = fm.Map(location=center, zoom_start=zoom, control_scale=True, tiles="CartoDB.Positron")
+    values = [f['properties'][metric] for f in geojson['features']]
+    finite = [v for v in values if np.isfinite(v)]
+    vmin, vmax = (min(finite), max(finite)) if finite else (0.0, 1.0)
+    cmap = branca.colormap.LinearColormap(['#ffffb2', '#fd8d3c', '#bd0026'], vmin=vmin, vmax=max(vmax, vmin + 1e-9))
+    cmap.caption = metric_label
+    fm.GeoJson(
+        geojson,
+        name=metric_label,
+        style_function=lambda f: {
+            'fillColor': cmap(f['properties'][metric]) if np.isfinite(f['properties'][metric]) else '#808080',
+            'color': '#444', 'weight': 0.5, 'fillOpacity': 0.7,
+        },
+        highlight_function=lambda f: {'weight': 2, 'color': '#000'},
+        tooltip=fm.GeoJsonTooltip(
+            fields=['Name', 'Projects', 'ContractCost', 'SuspiciousShare', 'CostShareRatio'],
+            aliases=['Area', 'Projects', 'Total Cost (PHP)', 'Suspicious %', 'Cost/Project Share'],
+            localize=True,
+        ),
+    ).add_to(m)
+    cmap.add_to(m)
+    return m
@@ -0,0 +1,78 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pandas as pd
+
+from analytics.forensics import (
+    benford_frequencies, benford_mad, benford_conformity, bid_variance_distribution,
+    kmeans_clusters, contractor_ranking,
+    benford_figure, bid_variance_figure, cluster_figure, contractor_figure, figure_png,
+)
+
+MIN_GROUP_SIZE = 30
+# Each worker is a separate interpreter with sklearn and scipy loaded (~250 MB
+# resident), so the pool is small by default and shut down when idle
+POOL_PROCESSES = int(os.environ.get("FLOODGATE_POOL_PROCESSES", "2"))
+POOL_IDLE_SECONDS = float(os.environ.get("FLOODGATE_POOL_IDLE_SECONDS", "600"))
+
+
+def create_process_pool(processes=POOL_PROCESSES):
+    """Process pool for CPU-bound NumPy/sklearn work.
+
+    Workers are spawned rather than forked, since forking a threaded server is unsafe.
+    """
+    return ProcessPoolExecutor(max_workers=max(1, processes), mp_context=multiprocessing.get_context("spawn"))
+
+
+def create_executors(processes=POOL_PROCESSES, threads=4):
+    """Process pool for CPU-bound NumPy/sklearn work, thread pool for figure rendering"""
+    return create_process_pool(processes), ThreadPoolExecutor(max_workers=threads)
+
+
+def _render(builder, *args):
+    return figure_png(builder(*args))
+
+
+def run_forensics(df, process_pool, thread_pool, group_by='Region'):
+    """Runs the forensic computations concurrently and renders their figures.
+
+    Only NumPy arrays are shipped to the workers. Returns PNG bytes per figure
+    (None when there is not enough data) and a per-group Benford table.
+    """
+    costs = df['ContractCost'].to_numpy()
+    futures = {
+        'benford': process_pool.submit(benford_frequencies, costs),
+        'bid_variance': process_pool.submit(bid_variance_distribution, df['BudgetVariance'].to_numpy()),
+        'clusters': process_pool.submit(kmeans_clusters, costs, df['Duration'].to_numpy()),
+        'contractors': process_pool.submit(contractor_ranking, df['Contractor'].to_numpy(), costs),
+    }
+    group_futures = {
+        name: process_pool.submit(benford_frequencies, group.to_numpy())
+        for name, group in df.groupby(group_by)['ContractCost']
+        if len(group) >= MIN_GROUP_SIZE
+    }
+
+    observed, _ = futures['benford'].result()
+    clusters = futures['clusters'].result()
+    contractors = futures['contractors'].result()
+    renders = {
+        'benford': thread_pool.submit(_render, benford_figure, observed) if observed is not None else None,
+        'bid_variance': thread_pool.submit(_render, bid_variance_figure, futures['bid_variance'].result()),
+        'clusters': thread_pool.submit(_render, cluster_figure, clusters) if clusters is not None else None,
+        'contractors': thread_pool.submit(_render, contractor_figure, contractors) if not contractors.empty else None,
+    }
+
+    rows = []
+    for name, future in group_futures.items():
+        group_observed, n = future.result()
+        if group_observed is None:
+            continue
+        mad = benford_mad(group_observed)
+        rows.append({group_by: name, 'Projects': n, 'MAD': mad, 'Conformity': benford_conformity(mad)})
+    regional = pd.DataFrame(rows, columns=[group_by, 'Projects', 'MAD', 'Conformity'])
+
+    return {
+        'figures': {name: render.result() if render else None for name, render in renders.items()},
+        'benford_by_group': regional.sort_values('MAD', ascending=False, ignore_index=True),
+    }
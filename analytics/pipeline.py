@@ -0,0 +1,257 @@
+"""Cached entry points for the hot paths, shared by the app, notebooks and batch jobs.
+
+Results are kept in the analytics.cache backend. Derived results are keyed by
+an explicit version string (dataset_version() or frame_version(df)) and take
+the frame itself as an unhashed `_df` argument. Returned objects are shared
+between callers: treat them as read-only.
+"""
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from analytics.cache import cached
+from analytics.instrumentation import timed, cache_miss
+from analytics.dataset import (
+    DATA_PATH, SNAPSHOT_PATH, dataset_version, ensure_snapshot, file_version, frame_version, load_raw,
+    read_quality_report, read_raw_page,
+)
+from analytics.anomaly import anomaly_scores, isolation_forest_scores
+from analytics.regression import load_or_fit_cost_models, unexplained_cost
+from analytics.timeseries import REAGGREGATED_METRICS, build_base_rollup, build_rollup, reaggregate_rollup
+from analytics.filters import Filters, apply_filter, filter_options as _filter_options
+from analytics.geo import area_rollup, load_boundaries, join_rollup, tolerance_for_zoom
+from analytics.parallel import POOL_IDLE_SECONDS, create_executors, create_process_pool, run_forensics
+
+_executors_lock = threading.Lock()
+_executors = None
+# Forensic runs currently using the pools, and when the last one finished
+_executors_active = 0
+_executors_last_used = 0.0
+
+
+def load_raw_data() -> pd.DataFrame:
+    """The raw CSV, read once per version of the file"""
+    return raw_data(file_version(DATA_PATH))
+
+
+@timed("raw_data")
+@cached("raw_data", max_entries=1, persist=False)
+@cache_miss("raw_data")
+def raw_data(version: str) -> pd.DataFrame:
+    return load_raw()
+
+
+def load_raw_page(page: int, size: int) -> pd.DataFrame:
+    """One page of the raw CSV, without reading the whole file"""
+    return raw_page(file_version(DATA_PATH), page, size)
+
+
+@timed("raw_page")
+@cached("raw_page", max_entries=32, persist=False)
+@cache_miss("raw_page")
+def raw_page(version: str, page: int, size: int) -> pd.DataFrame:
+    return read_raw_page(page, size)
+
+
+def load_dataset() -> pd.DataFrame:
+    """The prepared dataset of the current snapshot (rebuilt first if it is stale)"""
+    ensure_snapshot()
+    return prepared_dataset(dataset_version())
+
+
+@timed("prepared_dataset")
+@cached("prepared_dataset", max_entries=2, persist=False)
+@cache_miss("prepared_dataset")
+def prepared_dataset(version: str) -> pd.DataFrame:
+    """Snapshot joined with the peer-group anomaly scores and the unexplained cost"""
+    dataset = pd.read_parquet(SNAPSHOT_PATH)
+    dataset = dataset.join(anomaly_scores(dataset))
+    dataset = dataset.join(unexplained_cost(cost_models(version, dataset), dataset))
+    # Carried into every filtered view, so frame_version keys change with the data
+    dataset.attrs["dataset_version"] = version
+    return dataset
+
+
+def load_quality_report() -> dict:
+    """Data quality report of the current snapshot"""
+    ensure_snapshot()
+    return quality_report(dataset_version())
+
+
+@cached("quality_report", max_entries=2)
+def quality_report(version: str) -> dict:
+    return read_quality_report()
+
+
+def load_cost_models() -> dict:
+    """Cost-driver models for the current dataset"""
+    dataset = load_dataset()
+    return cost_models(dataset_version(), dataset)
+
+
+@timed("cost_models")
+@cached("cost_models", max_entries=2)
+@cache_miss("cost_models")
+def cost_models(version: str, _df: pd.DataFrame) -> dict:
+    """Fitted cost-driver models (trained once per dataset version, then loaded from disk)"""
+    return load_or_fit_cost_models(_df, version)
+
+
+@timed("isolation_scores")
+@cached("isolation_scores", max_entries=4)
+@cache_miss("isolation_scores")
+def isolation_scores(version: str, _df: pd.DataFrame) -> pd.Series:
+    """Isolation Forest scores of the full dataset, fitted once per dataset version (see version_of)"""
+    return isolation_forest_scores(_df)
+
+
+@cached("filter_options", max_entries=8)
+def filter_options(version: str, _df: pd.DataFrame) -> dict:
+    """Sorted filter choices, computed once per frame version"""
+    return _filter_options(_df)
+
+
+@timed("filtered_dataset")
+@cached("filtered_dataset", max_entries=8, persist=False)
+@cache_miss("filtered_dataset")
+def filtered_dataset(version: str, filters: Filters, _df: pd.DataFrame) -> pd.DataFrame:
+    """Rows of `_df` matching `filters`, gathered once per frame version and selection"""
+    return apply_filter(_df, filters)
+
+
+@cached("sort_order", max_entries=64, persist=False)
+def sort_order(version: str, column: str, ascending: bool, _df: pd.DataFrame) -> np.ndarray:
+    """Row positions of `_df` sorted by `column`, computed once per frame version"""
+    values = pd.Series(_df[column].to_numpy())
+    return values.sort_values(ascending=ascending, kind='stable', na_position='last').index.to_numpy()
+
+
+@timed("period_rollup")
+@cached("period_rollup", max_entries=32)
+@cache_miss("period_rollup")
+def period_rollup(version: str, freq: str, by: Optional[str], _df: pd.DataFrame) -> pd.DataFrame:
+    """Period rollup of `_df` (see timeseries.build_rollup), built once per frame version"""
+    return build_rollup(_df, freq, by)
+
+
+@timed("base_rollup")
+@cached("base_rollup", max_entries=2)
+@cache_miss("base_rollup")
+def base_rollup(version: str, _df: pd.DataFrame) -> pd.DataFrame:
+    """Monthly rollup of the whole dataset at the timeseries.BASE_GRAIN, built once per dataset version"""
+    return build_base_rollup(_df)
+
+
+@cached("reaggregated_rollup", max_entries=32)
+def reaggregated_rollup(version: str, regions: Tuple[str, ...], works: Tuple[str, ...],
+                        years: Optional[Tuple[int, int]], freq: str, by: Optional[str],
+                        _df: pd.DataFrame) -> pd.DataFrame:
+    return reaggregate_rollup(base_rollup(version, _df), freq, by, regions, works, years)
+
+
+def trend_rollup(df: pd.DataFrame, filters: Filters, freq: str, by: Optional[str], metric: str) -> pd.DataFrame:
+    """Period rollup of the rows of the full dataset `df` matching `filters`, with `metric` exact.
+
+    Region, type-of-work and funding-year filters are answered from the base
+    rollup for the metrics in timeseries.REAGGREGATED_METRICS. Name, ID,
+    province and anomaly-score filters, and MedianDuration, need the rows
+    themselves, so those requests fall back to period_rollup.
+    """
+    version = frame_version(df)
+    needs_rows = filters.search_term or filters.search_id or filters.provinces or filters.min_anomaly_score
+    if needs_rows or metric not in REAGGREGATED_METRICS:
+        filtered = filtered_dataset(version, filters, df)
+        return period_rollup(frame_version(filtered), freq, by, filtered)
+    return reaggregated_rollup(version, filters.regions, filters.works, filters.years, freq, by, df)
+
+
+def executors() -> Tuple[ProcessPoolExecutor, ThreadPoolExecutor]:
+    """Process and thread pools shared by every caller in this process.
+
+    They are created on first use and shut down after POOL_IDLE_SECONDS
+    without a forensic run; the next call creates them again.
+    """
+    global _executors, _executors_last_used
+    with _executors_lock:
+        if _executors is None:
+            _executors = create_executors()
+            _executors_last_used = time.monotonic()
+            threading.Thread(target=_shutdown_when_idle, name="floodgate-pool-reaper", daemon=True).start()
+        return _executors
+
+
+def _shutdown_when_idle():
+    global _executors
+    while True:
+        time.sleep(min(POOL_IDLE_SECONDS, 60))
+        with _executors_lock:
+            if _executors is None:
+                return
+            if not _executors_active and time.monotonic() - _executors_last_used > POOL_IDLE_SECONDS:
+                for pool in _executors:
+                    pool.shutdown(wait=False)
+                _executors = None
+                return
+
+
+def _replace_process_pool(broken):
+    """Swaps a process pool whose worker died for a new one (once, however many callers saw it break)"""
+    global _executors
+    with _executors_lock:
+        if _executors is not None and _executors[0] is broken:
+            broken.shutdown(wait=False, cancel_futures=True)
+            _executors = (create_process_pool(), _executors[1])
+
+
+@contextmanager
+def _pools_in_use():
+    global _executors_active, _executors_last_used
+    with _executors_lock:
+        _executors_active += 1
+    try:
+        yield executors()
+    finally:
+        with _executors_lock:
+            _executors_active -= 1
+            _executors_last_used = time.monotonic()
+
+
+@timed("forensic_results")
+@cached("forensic_results", max_entries=32)
+@cache_miss("forensic_results")
+def forensic_results(version: str, _df: pd.DataFrame) -> dict:
+    """Forensic figures (PNG bytes) and per-region Benford table, computed concurrently once per frame version.
+
+    If a worker process has died the pool is rebuilt and the run retried once;
+    a second BrokenProcessPool is raised to the caller.
+    """
+    with _pools_in_use() as (process_pool, thread_pool):
+        try:
+            return run_forensics(_df, process_pool, thread_pool)
+        except BrokenProcessPool:
+            _replace_process_pool(process_pool)
+    with _pools_in_use() as (process_pool, thread_pool):
+        return run_forensics(_df, process_pool, thread_pool)
+
+
+@cached("boundaries", max_entries=2, persist=False)
+def boundaries(level: str) -> Optional[dict]:
+    """Bundled boundary GeoJSON for a level, or None if it is not installed"""
+    return load_boundaries(level)
+
+
+@timed("choropleth_geojson")
+@cached("choropleth_geojson", max_entries=16)
+@cache_miss("choropleth_geojson")
+def choropleth_geojson(version: str, level: str, zoom: int, _df: pd.DataFrame) -> Optional[dict]:
+    """Rollup of `_df` by `level` joined to geometry simplified for `zoom`; None without boundary files"""
+    geometry = boundaries(level)
+    if geometry is None:
+        return None
+    return join_rollup(geometry, area_rollup(_df, level), level, tolerance_for_zoom(zoom))
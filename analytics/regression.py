@@ -0,0 +1,103 @@
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import GradientBoostingRegressor
+from sklearn.impute import SimpleImputer
+from sklearn.linear_model import Ridge
+from sklearn.model_selection import train_test_split
+from sklearn.pipeline import Pipeline, make_pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+CATEGORICAL_FEATURES = ['TypeOfWork', 'Region', 'Province', 'FundingYear']
+NUMERIC_FEATURES = ['Duration', 'ContractorCount']
+MODEL_DIR = "data/models"
+
+
+def _features(df):
+    X = df[CATEGORICAL_FEATURES + NUMERIC_FEATURES].copy()
+    X[CATEGORICAL_FEATURES] = X[CATEGORICAL_FEATURES].astype(str)
+    return X
+
+
+def _preprocessor():
+    # One-hot columns stay sparse; numeric columns are scaled without centering to keep them sparse too
+    return ColumnTransformer([
+        ('categorical', OneHotEncoder(handle_unknown='ignore', min_frequency=5), CATEGORICAL_FEATURES),
+        ('numeric', make_pipeline(SimpleImputer(strategy='median'), StandardScaler(with_mean=False)), NUMERIC_FEATURES),
+    ], sparse_threshold=1.0)
+
+
+def fit_cost_models(df, random_state=42):
+    """Fits ridge and gradient-boosted models of log ContractCost.
+
+    Returns a dict with both fitted pipelines, holdout R² per model, the ridge
+    coefficient table and the boosted model's importance per attribute.
+    """
+    train = df[df['ContractCost'] > 0]
+    X, y = _features(train), np.log1p(train['ContractCost'])
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=random_state)
+
+    models = {
+        'ridge': Pipeline([('features', _preprocessor()), ('model', Ridge(alpha=1.0))]),
+        'gbm': Pipeline([('features', _preprocessor()), ('model', GradientBoostingRegressor(
+            n_estimators=300, max_depth=3, learning_rate=0.05, subsample=0.8, random_state=random_state))]),
+    }
+    scores = {}
+    for name, model in models.items():
+        model.fit(X_train, y_train)
+        scores[name] = model.score(X_test, y_test)
+
+    ridge_names = models['ridge'][:-1].get_feature_names_out()
+    coefficients = pd.DataFrame({
+        'Feature': ridge_names,
+        'Coefficient': models['ridge'][-1].coef_,
+    })
+    # The target is log cost, so exp(coef) - 1 is the relative change in cost
+    coefficients['CostEffectPct'] = np.expm1(coefficients['Coefficient']) * 100
+    coefficients = coefficients.reindex(coefficients['Coefficient'].abs().sort_values(ascending=False).index)
+
+    gbm_names = models['gbm'][:-1].get_feature_names_out()
+    attributes = [_attribute(name) for name in gbm_names]
+    importances = (
+        pd.Series(models['gbm'][-1].feature_importances_, index=attributes)
+        .groupby(level=0).sum().sort_values(ascending=False)
+        .rename('Importance').rename_axis('Attribute').reset_index()
+    )
+
+    return {
+        'models': models,
+        'r2': scores,
+        'coefficients': coefficients.reset_index(drop=True),
+        'importances': importances,
+    }
+
+
+def _attribute(feature_name):
+    """Maps an encoded feature name such as 'categorical__Region_NCR' back to 'Region'"""
+    name = feature_name.split('__', 1)[-1]
+    for col in CATEGORICAL_FEATURES + NUMERIC_FEATURES:
+        if name == col or name.startswith(f"{col}_"):
+            return col
+    return name
+
+
+def unexplained_cost(result, df, model='gbm'):
+    """ContractCost minus the model's prediction (PHP); large positive values are unexplained by the attributes"""
+    predicted = np.expm1(result['models'][model].predict(_features(df)))
+    return pd.Series(df['ContractCost'].to_numpy() - predicted, index=df.index, name='UnexplainedCost')
+
+
+def load_or_fit_cost_models(df, version, model_dir=MODEL_DIR):
+    """Loads the fitted models for this dataset version from disk, fitting and saving them if missing"""
+    path = os.path.join(model_dir, f"cost_models-{version}.joblib")
+    if os.path.exists(path):
+        return joblib.load(path)
+    result = fit_cost_models(df)
+    os.makedirs(model_dir, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    joblib.dump(result, tmp_path)
+    os.replace(tmp_path, path)
+    return result
@@ -0,0 +1,43 @@
+from dataclasses import dataclass
+from typing import Optional
+
+import pandas as pd
+
+
+@dataclass(frozen=True)
+class Summary:
+    """Headline figures of a (filtered) project frame"""
+    projects: int
+    total_cost: float
+    flagged_projects: int
+    suspicious_cost: float
+    anomalies: int
+    anomalous_cost: float
+    top_type_of_work: Optional[str] = None
+    mean_duration: Optional[float] = None
+    most_expensive_name: Optional[str] = None
+    most_expensive_cost: Optional[float] = None
+
+
+def summarize(df: pd.DataFrame) -> Summary:
+    """Counts and totals shown as KPI cards; the 'top' fields are None for an empty frame"""
+    suspicious = df['IsSuspicious'].to_numpy()
+    anomalous = df['IsAnomaly'].to_numpy() if 'IsAnomaly' in df.columns else None
+    cost = df['ContractCost']
+    summary = dict(
+        projects=len(df),
+        total_cost=float(cost.sum()),
+        flagged_projects=int(suspicious.sum()),
+        suspicious_cost=float(cost[suspicious].sum()),
+        anomalies=int(anomalous.sum()) if anomalous is not None else 0,
+        anomalous_cost=float(cost[anomalous].sum()) if anomalous is not None else 0.0,
+    )
+    if not df.empty:
+        most_expensive = df.loc[cost.idxmax()]
+        summary.update(
+            top_type_of_work=df['TypeOfWork'].mode()[0],
+            mean_duration=float(df['Duration'].mean()),
+            most_expensive_name=most_expensive['ProjectName'],
+            most_expensive_cost=float(most_expensive['ContractCost']),
+        )
+    return Summary(**summary)
@@ -0,0 +1,86 @@
+import pandas as pd
+
+FREQUENCIES = {'Monthly': 'M', 'Quarterly': 'Q'}
+# Grouping columns of the base rollup, besides the month
+BASE_GRAIN = ['Region', 'TypeOfWork', 'FundingYear']
+ADDITIVE_METRICS = ['ContractCost', 'ApprovedBudgetForContract', 'Projects', 'SuspiciousProjects', 'DurationCount']
+TREND_METRICS = {
+    'Contract Cost': 'ContractCost',
+    'Approved Budget': 'ApprovedBudgetForContract',
+    'Projects': 'Projects',
+    'Suspicious Share (%)': 'SuspiciousShare',
+    'Median Duration (days)': 'MedianDuration',
+    'Percent Saved (%)': 'PercentSaved',
+}
+# Metrics reaggregate_rollup reproduces exactly; a median cannot be rebuilt
+# from group medians, so MedianDuration always comes from the rows
+REAGGREGATED_METRICS = ADDITIVE_METRICS + ['SuspiciousShare', 'PercentSaved']
+
+
+def build_rollup(df, freq='M', by=None, date_col='StartDate'):
+    """Aggregates projects per period (and per `by` group) into a small frame.
+
+    Columns: Period (period start), Group, the additive totals in
+    ADDITIVE_METRICS, MedianDuration and the derived ratios.
+    """
+    period = df[date_col].dt.to_period(freq).dt.start_time.rename('Period')
+    group = df[by].fillna('Unknown').rename('Group') if by else pd.Series('All', index=df.index, name='Group')
+    rollup = df.groupby([period, group]).agg(
+        ContractCost=('ContractCost', 'sum'),
+        ApprovedBudgetForContract=('ApprovedBudgetForContract', 'sum'),
+        Projects=('ContractCost', 'size'),
+        SuspiciousProjects=('IsSuspicious', 'sum'),
+        DurationCount=('Duration', 'count'),
+        MedianDuration=('Duration', 'median'),
+    ).reset_index()
+    return _add_ratios(rollup)
+
+
+def build_base_rollup(df, date_col='StartDate'):
+    """Monthly totals per BASE_GRAIN group: the finest grain reaggregate_rollup works from.
+
+    Built once per dataset; regions, types of work and funding years can
+    then be filtered and rolled up without touching the project rows.
+    """
+    period = df[date_col].dt.to_period('M').dt.start_time.rename('Period')
+    base = df.groupby([period] + [df[col] for col in BASE_GRAIN], dropna=False).agg(
+        ContractCost=('ContractCost', 'sum'),
+        ApprovedBudgetForContract=('ApprovedBudgetForContract', 'sum'),
+        Projects=('ContractCost', 'size'),
+        SuspiciousProjects=('IsSuspicious', 'sum'),
+        DurationCount=('Duration', 'count'),
+    ).reset_index()
+    return base[base['Period'].notna()].reset_index(drop=True)
+
+
+def reaggregate_rollup(base, freq='M', by=None, regions=(), works=(), years=None):
+    """Rolls a base rollup up to `freq` periods and `by` groups, keeping only the selected rows.
+
+    Same columns as build_rollup except MedianDuration (see REAGGREGATED_METRICS).
+    """
+    mask = pd.Series(True, index=base.index)
+    if regions:
+        mask &= base['Region'].isin(regions)
+    if works:
+        mask &= base['TypeOfWork'].isin(works)
+    if years:
+        mask &= base['FundingYear'].between(*years)
+    base = base[mask]
+
+    period = base['Period'].dt.to_period(freq).dt.start_time.rename('Period')
+    group = base[by].fillna('Unknown').rename('Group') if by else pd.Series('All', index=base.index, name='Group')
+    merged = base[ADDITIVE_METRICS].groupby([period, group]).sum(min_count=1).reset_index()
+    return _add_ratios(merged)
+
+
+def _add_ratios(rollup):
+    rollup['SuspiciousShare'] = rollup['SuspiciousProjects'] / rollup['Projects'] * 100
+    rollup['PercentSaved'] = (
+        (rollup['ApprovedBudgetForContract'] - rollup['ContractCost']) / rollup['ApprovedBudgetForContract'] * 100
+    )
+    return rollup.sort_values(['Period', 'Group'], ignore_index=True)
+
+
+def top_groups(rollup, n=8):
+    """Names of the `n` groups with the largest total contract cost"""
+    return rollup.groupby('Group')['ContractCost'].sum().nlargest(n).index.tolist()
@@ -0,0 +1,59 @@
+import re
+
+from data.mapping_dicts import TypeOfWork_full_color
+
+CSS_PATH = "styles/main.css"
+
+FLOOD_SUSCEPTIBILITY = [
+    ("#002673", "Very High Susceptibility"),
+    ("#5900ff", "High Susceptibility"),
+    ("#b045ff", "Moderate Susceptibility"),
+    ("#e3d1ff", "Low Susceptibility"),
+]
+LANDSLIDE_SUSCEPTIBILITY = [
+    ("#902400", "Very High Susceptibility"),
+    ("red", "High Susceptibility"),
+    ("green", "Moderate Susceptibility"),
+    ("yellow", "Low Susceptibility"),
+]
+
+
+def minify_css(css):
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{};,])\s*", r"\1", css)
+    return css.replace(";}", "}").strip()
+
+
+def tow_legend_html(colors=TypeOfWork_full_color):
+    items = "".join(
+        f'<div style="display:flex;align-items:center;">'
+        f'<div style="width:14px;height:14px;background:{color};border:1px solid #444;margin-right:8px;flex:none;"></div>'
+        f'<div style="line-height:14px;">{work_type}</div></div>'
+        for work_type, color in colors.items()
+    )
+    return (
+        '<div style="font-family:\'Segoe UI\',Roboto,sans-serif;max-height:300px;overflow-y:auto;">'
+        f'<div style="display:grid;grid-template-columns:1fr 1fr;gap:10px;font-size:14px;">{items}</div></div>'
+    )
+
+
+def susceptibility_legend_html(items):
+    rows = "".join(
+        f'<div style="margin-bottom:5px;"><span style="display:inline-block;width:12px;height:12px;'
+        f'background-color:{color};border:1px solid #ccc;"></span> {label}</div>'
+        for color, label in items
+    )
+    return f'<div style="font-size:12px;">{rows}</div>'
+
+
+def build_assets(css_path=CSS_PATH):
+    """Builds the minified page CSS and the legend markup"""
+    with open(css_path) as f:
+        css = minify_css(f.read())
+    return {
+        "css": f"<style>{css}</style>",
+        "tow_legend": tow_legend_html(),
+        "flood_legend": susceptibility_legend_html(FLOOD_SUSCEPTIBILITY),
+        "landslide_legend": susceptibility_legend_html(LANDSLIDE_SUSCEPTIBILITY),
+    }
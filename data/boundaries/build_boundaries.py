@@ -0,0 +1,146 @@
+"""Rebuilds the approximate province and municipality boundaries in this folder.
+
+    pip install shapely psgc basemap-data
+    python data/boundaries/build_boundaries.py
+
+Each municipality is the union of the Voronoi cells of its barangays'
+coordinates (from the psgc package), clipped to the GSHHS intermediate
+coastline (from basemap-data) and to 15 km around the barangays. Provinces
+are unions of their municipalities. See README.md for sources and caveats.
+"""
+import json
+import os
+from importlib import resources
+
+import numpy as np
+import shapely
+from shapely.geometry import MultiPoint, Polygon, box, mapping
+
+OUT_DIR = os.path.dirname(os.path.abspath(__file__))
+BOUNDS = (114.0, 3.5, 128.0, 22.0)
+REACH_DEGREES = 0.135  # ~15 km
+TOLERANCE = 0.001      # ~110 m, below a screen pixel up to zoom 10 (geo.tolerance_for_zoom)
+PRECISION = 4
+
+# Independent cities and special groups are listed as their own pseudo-province
+# in the PSGC; the DPWH data files them under the surrounding province.
+GEOGRAPHIC_PROVINCES = {
+    'City of Angeles (Independent City)': 'Pampanga',
+    'City of Olongapo (Independent City)': 'Zambales',
+    'City of Lucena (Independent City)': 'Quezon',
+    'City of Iloilo (Independent City)': 'Iloilo',
+    'City of Cebu (Independent City)': 'Cebu',
+    'City of Lapu-Lapu (Independent City)': 'Cebu',
+    'City of Mandaue (Independent City)': 'Cebu',
+    'City of Tacloban (Independent City)': 'Leyte',
+    'City of Zamboanga (Independent City)': 'Zamboanga del Sur',
+    'City of Isabela (Not a Province)': 'Basilan',
+    'City of Cagayan De Oro (Independent City)': 'Misamis Oriental',
+    'City of Iligan (Independent City)': 'Lanao del Norte',
+    'City of Davao (Independent City)': 'Davao del Sur',
+    'City of General Santos (Independent City)': 'South Cotabato',
+    'National Capital Region (NCR)': 'Metro Manila',
+    'City of Baguio (Independent City)': 'Benguet',
+    'City of Butuan (Independent City)': 'Agusan del Norte',
+    'City of Puerto Princesa (Independent City)': 'Palawan',
+    'City of Bacolod (Independent City)': 'Negros Occidental',
+    'Special Geographic Area': 'Cotabato',
+}
+
+
+def _psgc(name):
+    return json.loads(resources.files("psgc").joinpath(f"data/core/{name}.json").read_text())
+
+
+def land_polygons():
+    """GSHHS intermediate-resolution land (minus lakes) within BOUNDS"""
+    data_dir = resources.files("mpl_toolkits.basemap_data")
+    raw = data_dir.joinpath("gshhs_i.dat").read_bytes()
+    land, lakes = [], []
+    for line in data_dir.joinpath("gshhsmeta_i.dat").read_text().splitlines():
+        fields = line.split()
+        level, npts, south, north = int(fields[0]), int(fields[2]), float(fields[3]), float(fields[4])
+        offset, nbytes = int(fields[5]), int(fields[6])
+        if north < BOUNDS[1] or south > BOUNDS[3] or npts < 4 or level > 2:
+            continue
+        ring = np.frombuffer(raw[offset:offset + nbytes], dtype='<f4').astype(float).reshape(npts, 2)
+        if ring[:, 0].max() < BOUNDS[0] or ring[:, 0].min() > BOUNDS[2]:
+            continue
+        (land if level == 1 else lakes).append(shapely.make_valid(Polygon(ring)))
+    area = box(*BOUNDS)
+    return shapely.union_all(land).difference(shapely.union_all(lakes)).intersection(area)
+
+
+def barangay_points():
+    """Barangay coordinates with their (province, municipality, municipality code)"""
+    provinces = {p['psgc_code']: p['name'] for p in _psgc("provinces")}
+    cities = {c['psgc_code']: c for c in _psgc("cities")}
+    points, owners = [], []
+    for barangay in _psgc("barangays"):
+        coordinate = barangay.get('coordinate')
+        if not coordinate or barangay.get('coordinate_source') == 'fallback_unverified':
+            continue
+        city = cities[barangay['city_code']]
+        if city['geographic_level'] == 'SubMun':
+            # Districts of Manila roll up into the City of Manila
+            city = cities[city['psgc_code'][:6] + '0000']
+        province = provinces[city['province_code']]
+        points.append((coordinate['longitude'], coordinate['latitude']))
+        owners.append((GEOGRAPHIC_PROVINCES.get(province, province), city['name'], city['psgc_code']))
+    return np.array(points), owners
+
+
+def _clean(geometry):
+    geometry = shapely.set_precision(geometry.simplify(TOLERANCE, preserve_topology=True), 10 ** -PRECISION)
+    parts = [part for part in getattr(geometry, 'geoms', [geometry])
+             if part.geom_type == 'Polygon' and part.area > 1e-6]
+    return shapely.MultiPolygon(parts) if len(parts) > 1 else (parts[0] if parts else None)
+
+
+def _write(path, features):
+    with open(path, "w") as f:
+        json.dump({'type': 'FeatureCollection', 'features': features}, f, separators=(',', ':'))
+        f.write("\n")
+    print(f"{os.path.basename(path)}: {len(features)} features, {os.path.getsize(path) / 1e6:.1f} MB")
+
+
+def main():
+    land = land_polygons()
+    points, owners = barangay_points()
+    cells = shapely.get_parts(shapely.voronoi_polygons(MultiPoint(points), extend_to=box(*BOUNDS)))
+    point_geoms = shapely.points(points)
+    point_index, cell_index = shapely.STRtree(cells).query(point_geoms, predicate='within')
+    cell_of = dict(zip(point_index, cell_index))
+    reach = shapely.buffer(point_geoms, REACH_DEGREES, quad_segs=4)
+
+    by_municipality = {}
+    for i, owner in enumerate(owners):
+        if i in cell_of:
+            by_municipality.setdefault(owner, []).append(shapely.intersection(cells[cell_of[i]], reach[i]))
+
+    land_tree = shapely.STRtree(shapely.get_parts(land))
+    municipalities, by_province = [], {}
+    for (province, municipality, code), parts in sorted(by_municipality.items()):
+        area = shapely.union_all(parts)
+        nearby = land_tree.geometries[land_tree.query(area)]
+        geometry = _clean(area.intersection(shapely.union_all(nearby)))
+        if geometry is None:
+            continue
+        by_province.setdefault(province, []).append(geometry)
+        municipalities.append({
+            'type': 'Feature',
+            'properties': {'province': province, 'municipality': municipality, 'psgc_code': code},
+            'geometry': mapping(geometry),
+        })
+
+    provinces = []
+    for province, parts in sorted(by_province.items()):
+        geometry = _clean(shapely.union_all(parts))
+        provinces.append({'type': 'Feature', 'properties': {'province': province}, 'geometry': mapping(geometry)})
+
+    _write(os.path.join(OUT_DIR, "provinces.geojson"), provinces)
+    _write(os.path.join(OUT_DIR, "municipalities.geojson"), municipalities)
+
+
+if __name__ == "__main__":
+    main()
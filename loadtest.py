@@ -0,0 +1,238 @@
+"""Load-test harness: simulates concurrent analyst sessions with Streamlit's AppTest.
+
+Every virtual user runs scripted sessions (open page, filter the sidebar,
+toggle charts) against the page scripts in this process, the way a single
+Streamlit worker would serve them. Reports rerun latency percentiles, RSS and
+CPU usage per concurrency level, counting the worker's live child processes
+(the forensics process pool) as well as the worker itself.
+
+    python loadtest.py --users 1,2,4,8 --iterations 3 --pages exploration,analysis
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from streamlit.testing.v1 import AppTest
+
+from analytics.instrumentation import rss_bytes
+
+PAGES = {
+    "exploration": "views/exploration.py",
+    "analysis": "views/analysis.py",
+    "preparation": "views/preparation.py",
+    "overview": "views/overview.py",
+}
+
+
+def _pick_region(at, rng):
+    region = at.sidebar.multiselect[0]
+    region.set_value([rng.choice(region.options)])
+
+
+def _clear_region(at, rng):
+    at.sidebar.multiselect[0].set_value([])
+
+
+# Each step changes widgets; the rerun that follows is what gets timed
+SCENARIOS = {
+    "exploration": [
+        ("open", lambda at, rng: None),
+        ("filter_region", _pick_region),
+        ("island_chart_type", lambda at, rng: at.radio(key="island_toggle").set_value("Bar Chart")),
+        ("histogram_log_scale", lambda at, rng: at.toggle[0].set_value(False)),
+        ("trend_split", lambda at, rng: at.selectbox(key="trend_by").set_value("Region")),
+        ("clear_filter", _clear_region),
+    ],
+    "analysis": [
+        ("open_map", lambda at, rng: None),
+        ("filter_region", _pick_region),
+        ("map_anomaly_colors", lambda at, rng: at.radio(key="map_color_mode").set_value("Anomaly Score")),
+        ("clear_filter", _clear_region),
+    ],
+    "preparation": [("open", lambda at, rng: None)],
+    "overview": [("open", lambda at, rng: None)],
+}
+
+
+def run_session(page, rng, timeout):
+    """One scripted session; returns (step, page, seconds, error) tuples"""
+    at = AppTest.from_file(PAGES[page], default_timeout=timeout)
+    results = []
+    for step, action in SCENARIOS[page]:
+        error = None
+        start = time.perf_counter()
+        try:
+            action(at, rng)
+            at.run()
+            if at.exception:
+                error = at.exception[0].value
+        except Exception as e:
+            error = str(e)
+        results.append((step, page, time.perf_counter() - start, error))
+        if error:
+            break
+    return results
+
+
+def _virtual_user(user, pages, iterations, timeout, seed):
+    rng = random.Random(seed + user)
+    results = []
+    for _ in range(iterations):
+        for page in pages:
+            results.extend(run_session(page, rng, timeout))
+    return results
+
+
+def _proc_stat(pid):
+    """Fields of /proc/<pid>/stat after the command name (state, ppid, ...), or None if it is gone"""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            stat = f.read()
+    except OSError:
+        return None
+    # The command name is parenthesised and may itself contain spaces or ')'
+    return stat[stat.rindex(")") + 2:].split()
+
+
+def _child_pids(root=None):
+    """PIDs of all live descendants of `root` (this process); empty where /proc is unavailable"""
+    root = root or os.getpid()
+    try:
+        pids = [int(entry) for entry in os.listdir("/proc") if entry.isdigit()]
+    except OSError:
+        return []
+    children = {}
+    for pid in pids:
+        stat = _proc_stat(pid)
+        if stat:
+            children.setdefault(int(stat[1]), []).append(pid)
+    found, queue = [], list(children.get(root, ()))
+    while queue:
+        pid = queue.pop()
+        found.append(pid)
+        queue.extend(children.get(pid, ()))
+    return found
+
+
+def _child_cpu_seconds(pids):
+    ticks = os.sysconf("SC_CLK_TCK")
+    total = 0.0
+    for pid in pids:
+        stat = _proc_stat(pid)
+        if stat:
+            # utime and stime, fields 14 and 15 of the full stat line
+            total += (int(stat[11]) + int(stat[12])) / ticks
+    return total
+
+
+def _child_rss_bytes(pids):
+    page = os.sysconf("SC_PAGE_SIZE")
+    total = 0
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/statm") as f:
+                total += int(f.read().split()[1]) * page
+        except (OSError, ValueError, IndexError):
+            continue
+    return total
+
+
+def _tree_rss_bytes():
+    """RSS of this process plus its live children"""
+    return rss_bytes() + _child_rss_bytes(_child_pids())
+
+
+class _RssSampler(threading.Thread):
+    def __init__(self, interval=0.2):
+        super().__init__(daemon=True)
+        self.interval, self.samples = interval, []
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            self.samples.append(_tree_rss_bytes())
+            self._stop_event.wait(self.interval)
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        return self.samples or [_tree_rss_bytes()]
+
+
+def _cpu_seconds():
+    """CPU time of this process, its reaped children and its live children (e.g. pool workers)"""
+    usage = [resource.getrusage(who) for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN)]
+    return sum(u.ru_utime + u.ru_stime for u in usage) + _child_cpu_seconds(_child_pids())
+
+
+def run_level(users, pages, iterations, timeout, seed=0):
+    """Runs `users` virtual users concurrently and summarizes latency and resource usage"""
+    sampler = _RssSampler()
+    sampler.start()
+    cpu_start, wall_start = _cpu_seconds(), time.perf_counter()
+    with ThreadPoolExecutor(max_workers=users) as pool:
+        futures = [pool.submit(_virtual_user, user, pages, iterations, timeout, seed) for user in range(users)]
+        results = [row for future in futures for row in future.result()]
+    wall = time.perf_counter() - wall_start
+    cpu = _cpu_seconds() - cpu_start
+    rss = sampler.stop()
+
+    latencies = np.array([seconds for _, _, seconds, error in results if not error])
+    per_step = {}
+    for step, page, seconds, error in results:
+        if not error:
+            per_step.setdefault(f"{page}.{step}", []).append(seconds)
+    return {
+        "users": users,
+        "reruns": len(results),
+        "errors": sum(1 for *_, error in results if error),
+        "p50_s": float(np.percentile(latencies, 50)) if len(latencies) else None,
+        "p95_s": float(np.percentile(latencies, 95)) if len(latencies) else None,
+        "max_s": float(latencies.max()) if len(latencies) else None,
+        "peak_rss_mb": max(rss) / 1e6,
+        "mean_rss_mb": float(np.mean(rss)) / 1e6,
+        "cpu_cores": cpu / wall if wall else 0.0,
+        "steps_p95_s": {name: float(np.percentile(values, 95)) for name, values in sorted(per_step.items())},
+        "first_errors": [error for *_, error in results if error][:3],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", default="1,2,4,8", help="comma-separated concurrency levels")
+    parser.add_argument("--iterations", type=int, default=3, help="sessions per virtual user and page")
+    parser.add_argument("--pages", default="exploration,analysis", help=f"comma-separated, from {', '.join(PAGES)}")
+    parser.add_argument("--timeout", type=float, default=120, help="seconds allowed per rerun")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    pages = [page.strip() for page in args.pages.split(",")]
+    levels = []
+    # An untimed session first, so the numbers measure warm caches rather than the first parse
+    for page in pages:
+        run_session(page, random.Random(args.seed), args.timeout)
+
+    print(f"{'users':>5} {'reruns':>6} {'errors':>6} {'p50 s':>7} {'p95 s':>7} {'max s':>7} {'peak RSS MB':>11} {'CPU cores':>9}")
+    for users in (int(u) for u in args.users.split(",")):
+        level = run_level(users, pages, args.iterations, args.timeout, args.seed)
+        levels.append(level)
+        fmt = lambda v: f"{v:7.3f}" if v is not None else f"{'-':>7}"
+        print(f"{level['users']:>5} {level['reruns']:>6} {level['errors']:>6} {fmt(level['p50_s'])} {fmt(level['p95_s'])} "
+              f"{fmt(level['max_s'])} {level['peak_rss_mb']:>11.1f} {level['cpu_cores']:>9.2f}")
+        for error in level["first_errors"]:
+            print(f"      error: {error}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(levels, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
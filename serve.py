@@ -0,0 +1,28 @@
+"""Launcher for the FloodGate server.
+
+    python serve.py [streamlit run options, e.g. --server.port 8501]
+
+Starts the cache warm-up (and, with FLOODGATE_READY_PORT set, the /ready
+endpoint) as soon as the process starts, then hands over to Streamlit's own
+bootstrap. Running `streamlit run streamlit-app.py` directly still works, but
+nothing is warmed until the caches are first used and /ready is not served.
+"""
+import logging
+import sys
+
+from streamlit.web import cli as stcli
+
+from warmup import start_warmup
+
+APP_PATH = "streamlit-app.py"
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    start_warmup()
+    sys.argv = ["streamlit", "run", APP_PATH, *sys.argv[1:]]
+    sys.exit(stcli.main())
+
+
+if __name__ == "__main__":
+    main()
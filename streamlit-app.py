@@ -1,4 +1,5 @@
 import streamlit as st
+from utils import render_debug_panel
 
 # Define pages
 home_page = st.Page(
@@ -41,6 +42,7 @@ pg = st.navigation({
 })
 
 pg.run()
+render_debug_panel()
 
 
 with st.sidebar:
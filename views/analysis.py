@@ -1,146 +1,218 @@
+import os
 import streamlit as st
 from streamlit_folium import st_folium
-import streamlit.components.v1 as components
 from utils import (
-    load_css, load_data, prep_data, get_filters, create_map,
-    plot_benfords_law, plot_bid_variance, plot_clustering, plot_top_contractors,
-    TypeOfWork_full_color
+    load_css, get_dataset, get_filters, create_map, render_table,
+    get_isolation_scores, frame_version, get_cost_models, get_cost_driver_fig,
+    get_forensic_results, MAP_CENTER, MAP_ZOOM, get_export_executor,
+    page_assets, get_choropleth, get_boundary_notes
 )
+from analytics.instrumentation import ENABLED as PROFILING, section, record_payload
+from analytics.export import EXPORT_FORMATS, submit_export
+from analytics.geo import CHOROPLETH_METRICS, BOUNDARY_FILES, BOUNDARY_README, detail_zoom
+from analytics.summary import summarize
+from analytics.dataset import version_of
 
 st.set_page_config(layout="centered", page_title="Analysis")
 load_css()
 
 # Initialization for map state
-CENTER = (11.891783, 122.419922)
 if "center" not in st.session_state:
-    st.session_state["center"] = CENTER
+    st.session_state["center"] = MAP_CENTER
 if "zoom" not in st.session_state:
-    st.session_state["zoom"] = 6
-
-df = load_data()
-clean_df = prep_data(df)
+    st.session_state["zoom"] = MAP_ZOOM
+# The choropleth tracks its own zoom, so zooming it never invalidates the marker maps.
+# choropleth_view_zoom is what st_folium is told, and only changes with the detail level
+if "choropleth_zoom" not in st.session_state:
+    st.session_state["choropleth_zoom"] = MAP_ZOOM
+    st.session_state["choropleth_view_zoom"] = MAP_ZOOM
+
+clean_df = get_dataset()
 filtered_df = get_filters(clean_df)
 
-st.markdown("""<div class="title-card">Analysis</div>""", unsafe_allow_html=True)
-
-if filtered_df.empty:
-    st.warning("No data matches filters.")
-else:
-    st.markdown("""
-    <div class="section-title">Geospatial Analysis</div>
-    """, unsafe_allow_html=True)
-
-    total_cost = (filtered_df['ContractCost'].sum())
-    suspicious_df = filtered_df[filtered_df['IsSuspicious']]
-    suspicious_val = suspicious_df['ContractCost'].sum()
-
-    c1, c2= st.columns(2)
-    c1.metric("Total Contract Value", f"₱{total_cost:,.0f}", border=True)
-    c2.metric("Suspicious Capital", f"₱{suspicious_val:,.0f}", help="Projects with cost > 99% of budget", border=True)
-    c1.metric("Flagged Projects", f"{len(suspicious_df)}", delta_color="inverse", border=True)
-    c2.metric("Projects Found", f"{len(filtered_df)}", border=True)
-
-    m = create_map(filtered_df, st.session_state["center"], st.session_state["zoom"])
-    st_folium(m, height=500, returned_objects=[], width=1000)
-
+# The map and the forensic dashboard are fragments so that interactions
+# inside them rerun only their own section, not the whole page.
+@st.fragment
+def map_section(filtered_df):
+    view = st.radio("Map view", ["Project Markers", "Provinces", "Municipalities"], horizontal=True, key="map_view")
+    if view != "Project Markers":
+        level = "Province" if view == "Provinces" else "Municipality"
+        metric_label = st.selectbox("Shade by", list(CHOROPLETH_METRICS), key="choropleth_metric")
+        detail = detail_zoom(st.session_state["choropleth_zoom"])
+        m = get_choropleth(frame_version(filtered_df), level, detail,
+                           CHOROPLETH_METRICS[metric_label], metric_label, filtered_df)
+        if m is None:
+            st.info(f"No boundary file found at `{BOUNDARY_FILES[level]}`. Add a simplified {level.lower()} GeoJSON to enable this view.")
+            return
+        # Only zoom is reported back, so panning causes no rerun. The arguments stay
+        # the same between detail levels, so reruns reuse the map already sent
+        state = st_folium(m, height=500, width=1000, returned_objects=["zoom"],
+                          zoom=st.session_state["choropleth_view_zoom"])
+        if state and state.get("zoom") is not None and state["zoom"] != st.session_state["choropleth_zoom"]:
+            st.session_state["choropleth_zoom"] = state["zoom"]
+            if detail_zoom(state["zoom"]) != detail:
+                # Redraw the outlines for the new level at the zoom the user chose
+                st.session_state["choropleth_view_zoom"] = state["zoom"]
+                st.rerun(scope="fragment")
+        caption, notes = st.columns([4, 1], vertical_alignment="center")
+        caption.caption("Outlines are approximate: they are derived from barangay locations, "
+                        "not official boundaries, so projects near a border may be shaded on the wrong side.")
+        notes_text = get_boundary_notes(BOUNDARY_README)
+        if notes_text:
+            with notes.popover("About the outlines"):
+                st.markdown(notes_text)
+        return
+
+    color_mode = st.radio(
+        "Color markers by", ["Type of Work", "Anomaly Score", "Isolation Forest"],
+        horizontal=True, key="map_color_mode"
+    )
+    if color_mode == "Isolation Forest":
+        scores = get_isolation_scores(version_of(clean_df), clean_df)
+        m = create_map(filtered_df.assign(IsolationScore=scores.loc[filtered_df.index]),
+                       st.session_state["center"], st.session_state["zoom"], color_by="IsolationScore")
+    elif color_mode == "Anomaly Score":
+        m = create_map(filtered_df, st.session_state["center"], st.session_state["zoom"], color_by="AnomalyScore")
+    else:
+        m = create_map(filtered_df, st.session_state["center"], st.session_state["zoom"])
+    if m is None:
+        return
+    with section("analysis.st_folium"):
+        if PROFILING:
+            record_payload("analysis.st_folium", len(m.get_root().render()))
+        st_folium(m, height=500, returned_objects=[], width=1000)
+
+    assets = page_assets()
     with st.expander("Type of Work Legend"):
-        html = """
-        <div style="font-family: 'Segoe UI', Roboto, sans-serif;">
-          <div style="display:grid; grid-template-columns: 1fr 1fr; gap:10px; font-size:14px;">
-        """
-        for work_type, color in TypeOfWork_full_color.items():
-            html += f'''
-              <div style="display:flex; align-items:center;">
-                <div style="width:14px; height:14px; background:{color}; border:1px solid #444; margin-right:8px;"></div>
-                <div style="line-height:14px; color: white">{work_type}</div>
-              </div>
-            '''
-        html += "</div></div>"
-        components.html(html, height=300, scrolling=True)
+        st.markdown(assets["tow_legend"], unsafe_allow_html=True)
 
     with st.expander("Map Susceptibility Legend"):
         c1, c2 = st.columns(2, vertical_alignment="center")
 
         with c1:
             st.markdown("**Flood Susceptibility**")
-            st.markdown("""
-            <div style="font-size: 12px; margin-bottom: 5px;">
-                <div style="margin-bottom: 5px;">
-                    <span style="display:inline-block; width:12px; height:12px; background-color:#002673; border:1px solid #ccc;"></span> Very High Susceptibility
-                </div>
-                <div style="margin-bottom: 5px;">
-                    <span style="display:inline-block; width:12px; height:12px; background-color:#5900ff; border:1px solid #ccc;"></span> High Susceptibility
-                </div>
-                <div style="margin-bottom: 5px;">
-                    <span style="display:inline-block; width:12px; height:12px; background-color:#b045ff; border:1px solid #ccc;"></span> Moderate Susceptibility
-                </div>
-                <div style="margin-bottom: 5px;">
-                    <span style="display:inline-block; width:12px; height:12px; background-color:#e3d1ff; border:1px solid #ccc;"></span> Low Susceptibility
-                </div>
-            </div>
-            """, unsafe_allow_html=True)
+            st.markdown(assets["flood_legend"], unsafe_allow_html=True)
 
         with c2:
             st.markdown("**Landslide Susceptibility**")
-            st.markdown("""
-                    <div style="font-size: 12px;">
-                        <div style="margin-bottom: 5px;">
-                            <span style="display:inline-block; width:12px; height:12px; background-color:#902400; border:1px solid #ccc;"></span> Very High Susceptibility
-                        </div>
-                        <div style="margin-bottom: 5px;">
-                            <span style="display:inline-block; width:12px; height:12px; background-color: red; border:1px solid #ccc;"></span> High Susceptibility
-                        </div>
-                        <div style="margin-bottom: 5px;">
-                            <span style="display:inline-block; width:12px; height:12px; background-color: green ; border:1px solid #ccc;"></span> Moderate Susceptibility
-                        </div>
-                        <div style="margin-bottom: 5px;">
-                            <span style="display:inline-block; width:12px; height:12px; background-color: yellow ; border:1px solid #ccc;"></span> Low Susceptibility
-                        </div>
-                    </div>
-                    """, unsafe_allow_html=True)
-
-    if not filtered_df.empty:
-        top_type = filtered_df['TypeOfWork'].mode()[0]
-        st.info(f"Most Common Work:\n**{top_type}**")
-
-        avg_dur = filtered_df['Duration'].mean()
-        st.success(f"Avg Duration:\n**{avg_dur:.0f} Days**")
-
-        max_proj = filtered_df.loc[filtered_df['ContractCost'].idxmax()]
-        st.warning(f"Most Expensive:\n**{max_proj['ProjectName'][:50]}...**\n(₱{max_proj['ContractCost']/1e6:.1f} M)")
+            st.markdown(assets["landslide_legend"], unsafe_allow_html=True)
 
+@st.fragment
+def forensic_dashboard(filtered_df):
     st.markdown("### Forensic Analysis Dashboard")
 
-    tab1, tab2, tab3 = st.tabs(["Fraud Detection", "Operational Efficiency", "Market Analysis"])
+    tab1, tab2, tab3, tab4 = st.tabs(["Fraud Detection", "Operational Efficiency", "Market Analysis", "Cost Drivers"])
+    # All four forensic computations run concurrently in worker processes
+    results = get_forensic_results(frame_version(filtered_df), filtered_df)
+    if results is None:
+        return
+    figures = results['figures']
 
     with tab1:
         st.markdown("**Benford's Law** - Detects artificial numbers.")
         st.markdown("*If the blue bars deviate significantly from the orange bars (especially for digits 7-9), the costs may be manipulated.*")
-        fig_benford = plot_benfords_law(filtered_df)
-        if fig_benford: st.pyplot(fig_benford)
+        if figures['benford']: st.image(figures['benford'])
+
+        st.markdown("**Benford Conformity by Region** - Mean absolute deviation from the expected first-digit distribution.")
+        if results['benford_by_group'].empty:
+            st.info("Not enough projects per region to test.")
+        else:
+            st.dataframe(results['benford_by_group'], width='stretch', hide_index=True)
 
         st.divider()
         st.markdown("**Bid Variance Screening** - Detects 'Ceiling Bidding'.")
         st.markdown("*A massive spike between 0% and 0.1% suggests contractors know the budget ceiling and are bidding just below it.*")
-        fig_var = plot_bid_variance(filtered_df)
-        st.pyplot(fig_var)
+        if figures['bid_variance']: st.image(figures['bid_variance'])
 
     with tab2:
         st.markdown("**Cluster Analysis (K-Means)** - Groups projects by Cost & Time.")
         st.markdown("*Look for outliers: High Cost projects with Short Duration (Top-Left) are red flags.*")
-        fig_cluster = plot_clustering(filtered_df)
-        if fig_cluster:
-            st.pyplot(fig_cluster)
+        if figures['clusters']:
+            st.image(figures['clusters'])
         else:
             st.warning("Not enough data points for clustering.")
 
     with tab3:
         st.markdown("**Contractor Dominance** - Who controls the market?")
-        fig_market = plot_top_contractors(filtered_df)
-        st.pyplot(fig_market)
+        if figures['contractors']: st.image(figures['contractors'])
+
+    with tab4:
+        st.markdown("**Cost Driver Regression** - Which attributes explain the contract cost?")
+        st.markdown("*Models of log contract cost on type of work, region, province, funding year, duration and contractor count, fitted on the full dataset.*")
+        cost_models = get_cost_models()
+        c1, c2 = st.columns(2)
+        c1.metric("Ridge Regression R²", f"{cost_models['r2']['ridge']:.2f}", help="Held-out 20% of projects", border=True)
+        c2.metric("Gradient Boosting R²", f"{cost_models['r2']['gbm']:.2f}", help="Held-out 20% of projects", border=True)
+        fig_drivers = get_cost_driver_fig(cost_models['importances'])
+        if fig_drivers: st.plotly_chart(fig_drivers, width='stretch')
+        st.markdown("**Strongest Linear Effects** (% change in cost)")
+        st.dataframe(cost_models['coefficients'].head(15), width='stretch', hide_index=True)
+        st.markdown("**Largest Unexplained Costs** - Cost above what the project's attributes predict.")
+        st.dataframe(
+            filtered_df.nlargest(10, 'UnexplainedCost')[['ProjectId', 'ProjectName', 'ContractCost', 'UnexplainedCost']],
+            width='stretch', hide_index=True
+        )
+
+@st.fragment
+def export_section(filtered_df):
+    c1, c2 = st.columns([2, 1], vertical_alignment="bottom")
+    fmt = c1.radio("Format", list(EXPORT_FORMATS), horizontal=True, key="export_format",
+                   help="GeoJSON exports one point feature per project for GIS tools.")
+    fingerprint = frame_version(filtered_df)
+    if c2.button("Prepare export", key="export_prepare"):
+        st.session_state["export_request"] = (fmt, fingerprint)
+
+    # Only offer the file that was requested for the current format and filters
+    if st.session_state.get("export_request") == (fmt, fingerprint):
+        future = submit_export(get_export_executor(), filtered_df, fmt, fingerprint)
+        with st.spinner(f"Writing {len(filtered_df):,} projects as {fmt}..."):
+            path = future.result()
+        extension, mime = EXPORT_FORMATS[fmt]
+        # A link to Streamlit's static file route: the server streams the file
+        # from disk, where st.download_button would load it all into memory
+        href = f"app/static/exports/{os.path.basename(path)}"
+        st.markdown(
+            f'<a href="{href}" download="floodgate_projects.{extension}" type="{mime}">'
+            f'Download {fmt} ({os.path.getsize(path) / 1e6:,.1f} MB)</a>',
+            unsafe_allow_html=True
+        )
+
+st.markdown("""<div class="title-card">Analysis</div>""", unsafe_allow_html=True)
+
+if filtered_df.empty:
+    st.warning("No data matches filters.")
+else:
+    st.markdown("""
+    <div class="section-title">Geospatial Analysis</div>
+    """, unsafe_allow_html=True)
+
+    summary = summarize(filtered_df)
+
+    c1, c2= st.columns(2)
+    c1.metric("Total Contract Value", f"₱{summary.total_cost:,.0f}", border=True)
+    c2.metric("Suspicious Capital", f"₱{summary.suspicious_cost:,.0f}", help="Projects with cost > 99% of budget", border=True)
+    c1.metric("Flagged Projects", f"{summary.flagged_projects}", delta_color="inverse", border=True)
+    c2.metric("Projects Found", f"{summary.projects}", border=True)
+    c1.metric("Peer-Group Anomalies", f"{summary.anomalies}",
+              help="Robust z-score above 3.5 for cost, cost per day or budget variance vs. same type, region and year", border=True)
+    c2.metric("Anomalous Capital", f"₱{summary.anomalous_cost:,.0f}", border=True)
+
+    map_section(filtered_df)
+
+    st.info(f"Most Common Work:\n**{summary.top_type_of_work}**")
+    st.success(f"Avg Duration:\n**{summary.mean_duration:.0f} Days**")
+    st.warning(f"Most Expensive:\n**{summary.most_expensive_name[:50]}...**\n(₱{summary.most_expensive_cost/1e6:.1f} M)")
+
+    forensic_dashboard(filtered_df)
+
+    with st.expander("Export Filtered Data"):
+        export_section(filtered_df)
 
     with st.expander("View Raw Data Table"):
-        st.dataframe(filtered_df[['ProjectId', 'ProjectName', 'Contractor', 'ContractCost', 'ApprovedBudgetForContract', 'BudgetVariance', 'Duration', 'StartDate']], width='stretch')
+        render_table(
+            filtered_df, key="analysis_raw",
+            columns=['ProjectId', 'ProjectName', 'Contractor', 'ContractCost', 'ApprovedBudgetForContract', 'BudgetVariance', 'Duration', 'StartDate', 'AnomalyScore', 'UnexplainedCost']
+        )
 
 
 st.markdown(
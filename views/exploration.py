@@ -1,51 +1,50 @@
 import streamlit as st
 import plotly.express as px
 from utils import (
-    load_css, load_data, prep_data, get_filters,
+    load_css, get_dataset, render_filters, filter_dataset,
     get_island_fig, get_region_fig, get_cost_hist_fig,
-    get_project_type_fig, get_contractor_figs
+    get_project_type_fig, get_contractor_figs,
+    get_trend_fig
 )
+from analytics.pipeline import trend_rollup
+from analytics.timeseries import FREQUENCIES, TREND_METRICS
+from analytics.instrumentation import section
 
 st.set_page_config(layout="centered", page_title="Exploration")
 load_css()
 
-df = load_data()
-clean_df = prep_data(df)
-filtered_df = get_filters(clean_df)
+clean_df = get_dataset()
+filters = render_filters(clean_df)
+filtered_df = filter_dataset(clean_df, filters)
 
-st.markdown('<div class="title-card">Data exploration</div>', unsafe_allow_html=True)
-
-if filtered_df.empty:
-    st.warning("No data matches your current filters. Please adjust the sidebar filters.")
-else:
-    # 1. GEOGRAPHIC DISTRIBUTION
-    st.markdown('<div class="section-title">Geographic Distribution</div>', unsafe_allow_html=True)
-
-    col1, col2 = st.columns(2)
-
-    with col1:
-        st.markdown('<div class="section-container"><b>Project Distribution by Island Group</b></div>', unsafe_allow_html=True)
-        island_chart_type = st.radio(
-            "Visualization Style",
-            ["Donut Chart", "Bar Chart"],
-            key="island_toggle",
-            horizontal=True,
-            label_visibility="collapsed"
-        )
-        fig_island = get_island_fig(filtered_df, island_chart_type)
+# Each chart with its own controls is a fragment: toggling a control reruns
+# only that fragment, reusing the filtered frame from the last full run.
+@st.fragment
+def island_section(filtered_df):
+    st.markdown('<div class="section-container"><b>Project Distribution by Island Group</b></div>', unsafe_allow_html=True)
+    island_chart_type = st.radio(
+        "Visualization Style",
+        ["Donut Chart", "Bar Chart"],
+        key="island_toggle",
+        horizontal=True,
+        label_visibility="collapsed"
+    )
+    fig_island = get_island_fig(filtered_df, island_chart_type)
+    with section("exploration.island_chart"):
         if fig_island: st.plotly_chart(fig_island, width='stretch')
         else: st.info("No data available.")
 
-    with col2:
-        st.markdown('<div class="section-container"><b>Regional Distribution</b></div>', unsafe_allow_html=True)
-        top_n_regions = st.slider("Show Top N Regions", min_value=5, max_value=17, value=10, key="region_slider")
-        fig_region = get_region_fig(filtered_df, top_n_regions)
+@st.fragment
+def region_section(filtered_df):
+    st.markdown('<div class="section-container"><b>Regional Distribution</b></div>', unsafe_allow_html=True)
+    top_n_regions = st.slider("Show Top N Regions", min_value=5, max_value=17, value=10, key="region_slider")
+    fig_region = get_region_fig(filtered_df, top_n_regions)
+    with section("exploration.region_chart"):
         if fig_region: st.plotly_chart(fig_region, width='stretch')
         else: st.info("No data available.")
 
-    # 2. FINANCIAL DISTRIBUTION
-    st.markdown('<div class="section-title">Cost Distribution</div>', unsafe_allow_html=True)
-
+@st.fragment
+def cost_hist_section(filtered_df):
     c_hist1, c_hist2 = st.columns([0.7, 0.3], border=True, vertical_alignment="top")
 
     with c_hist2:
@@ -57,25 +56,66 @@ else:
 
     with c_hist1:
         fig_hist = get_cost_hist_fig(filtered_df, dist_type, bin_count, use_log)
-        if fig_hist: st.plotly_chart(fig_hist, width='stretch')
-        else: st.info("No data available.")
+        with section("exploration.cost_hist"):
+            if fig_hist: st.plotly_chart(fig_hist, width='stretch')
+            else: st.info("No data available.")
 
-    # 3. PROJECT TYPES
-    st.markdown('<div class="section-title">Project Types</div>', unsafe_allow_html=True)
-    if not filtered_df.empty:
-        with st.container(border=True, key="chart_container"):
-            type_chart_style = st.radio("Chart Style", ["Bar Chart", "Pie Chart"], horizontal=True)
-
-        fig_tow = get_project_type_fig(filtered_df, type_chart_style)
-        if fig_tow:
-            with st.container(border=True):
-                st.plotly_chart(fig_tow, width='stretch')
-        else:
-            st.info("No project types found.")
+@st.fragment
+def project_type_section(filtered_df):
+    with st.container(border=True, key="chart_container"):
+        type_chart_style = st.radio("Chart Style", ["Bar Chart", "Pie Chart"], horizontal=True)
+
+    fig_tow = get_project_type_fig(filtered_df, type_chart_style)
+    if fig_tow:
+        with st.container(border=True):
+            st.plotly_chart(fig_tow, width='stretch')
     else:
         st.info("No project types found.")
 
-    # 4. CONTRACTOR MARKET SHARE
+@st.fragment
+def trend_section(clean_df, filters):
+    c1, c2, c3 = st.columns(3)
+    freq_label = c1.radio("Period", list(FREQUENCIES), horizontal=True, key="trend_freq")
+    metric_label = c2.selectbox("Metric", list(TREND_METRICS), key="trend_metric")
+    by_label = c3.selectbox("Split by", ["None", "Region", "Type of Work"], key="trend_by")
+    by = {"None": None, "Region": "Region", "Type of Work": "TypeOfWork"}[by_label]
+
+    # Re-aggregated from the dataset-wide base rollup where that is exact, else regrouped from the filtered rows
+    rollup = trend_rollup(clean_df, filters, FREQUENCIES[freq_label], by, TREND_METRICS[metric_label])
+    fig_trend = get_trend_fig(rollup, TREND_METRICS[metric_label], metric_label)
+    with section("exploration.trend_chart"):
+        if fig_trend: st.plotly_chart(fig_trend, width='stretch')
+        else: st.info("No dated projects available.")
+
+st.markdown('<div class="title-card">Data exploration</div>', unsafe_allow_html=True)
+
+if filtered_df.empty:
+    st.warning("No data matches your current filters. Please adjust the sidebar filters.")
+else:
+    # 1. GEOGRAPHIC DISTRIBUTION
+    st.markdown('<div class="section-title">Geographic Distribution</div>', unsafe_allow_html=True)
+
+    col1, col2 = st.columns(2)
+
+    with col1:
+        island_section(filtered_df)
+
+    with col2:
+        region_section(filtered_df)
+
+    # 2. FINANCIAL DISTRIBUTION
+    st.markdown('<div class="section-title">Cost Distribution</div>', unsafe_allow_html=True)
+    cost_hist_section(filtered_df)
+
+    # 3. PROJECT TYPES
+    st.markdown('<div class="section-title">Project Types</div>', unsafe_allow_html=True)
+    project_type_section(filtered_df)
+
+    # 4. TRENDS OVER TIME
+    st.markdown('<div class="section-title">Trends Over Time</div>', unsafe_allow_html=True)
+    trend_section(clean_df, filters)
+
+    # 5. CONTRACTOR MARKET SHARE
     st.markdown('<div class="section-title">Contractor Participation</div>', unsafe_allow_html=True)
     fig_val, fig_vol = get_contractor_figs(filtered_df)
     with st.container(border=True):
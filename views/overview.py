@@ -1,20 +1,18 @@
 import pandas as pd
 import streamlit as st
 
+from analytics.dataset import DTYPE_SAMPLE_ROWS
 from data.mapping_dicts import column_interpretations
-from utils import load_data, prep_data, load_css
+from utils import get_quality_report, load_css, render_raw_preview
 
 st.set_page_config(page_title="FloodGate", layout="centered")
 
 load_css()
-df = load_data()
-clean_df = prep_data(df)
-cols_to_clean = ['ContractCost', 'ApprovedBudgetForContract']
-for col in cols_to_clean:
-    if col in df.columns:
-        if df[col].dtype == 'object':
-            df[col] = df[col].astype(str).str.replace(',', '', regex=True)
-        df[col] = pd.to_numeric(df[col], errors='coerce')
+# Counts and budget totals over the raw rows come from the quality report
+# written with the snapshot, so this page never reads the whole CSV
+report = get_quality_report()
+budget_count = report["raw_budget_count"]
+average_budget = report["raw_budget_sum"] / budget_count if budget_count else 0.0
 
 st.markdown("""
     <div class="main-header">
@@ -37,9 +35,9 @@ with col1:
         </p>""", unsafe_allow_html=True)
 
 with col2:
-    col2.metric("Total Projects", len(df), border=True)
-    col2.metric("Average Approved Budget", f"₱{df['ApprovedBudgetForContract'].mean():,.0f}", border=True)
-    col2.metric("Total Approved Budget", f"₱{df['ApprovedBudgetForContract'].sum():,.0f}", border=True)
+    col2.metric("Total Projects", report["raw_rows"], border=True)
+    col2.metric("Average Approved Budget", f"₱{average_budget:,.0f}", border=True)
+    col2.metric("Total Approved Budget", f"₱{report['raw_budget_sum']:,.0f}", border=True)
 
 st.markdown("""
     <div>
@@ -110,15 +108,17 @@ col_df = pd.DataFrame({
 st.dataframe(col_df, width='stretch')
 
 st.info("Dataset Structure")
+raw_columns = report["raw_columns"]
 structure_df = pd.DataFrame({
-    "Column": df.columns,
-    "Non-Null Count": df.notnull().sum(),
-    "Data Type": df.dtypes.astype(str)
-})
+    "Column": raw_columns,
+    "Non-Null Count": [report["raw_rows"] - report["nulls"].get(col, 0) for col in raw_columns],
+    "Data Type": [report["raw_dtypes"].get(col) for col in raw_columns],
+}, index=raw_columns)
 st.dataframe(structure_df, width='stretch')
+st.caption(f"Data types as pandas infers them from the first {DTYPE_SAMPLE_ROWS:,} rows of the CSV.")
 
 st.info("Raw Dataset Preview")
-st.dataframe(df, width='stretch')
+render_raw_preview(report["raw_rows"], key="overview_raw")
 st.markdown(
     """
     <div style="
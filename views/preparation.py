@@ -1,13 +1,14 @@
 import streamlit as st
 import pandas as pd
-from utils import load_css, load_data, prep_data
+from analytics.dataset import EXCLUDED_YEARS
+from utils import load_css, get_dataset, render_table, get_quality_report
 
 st.set_page_config(layout="centered", page_title="Preparation")
 load_css()
-df = load_data()
+report = get_quality_report()
 
 st.markdown('<div class="title-card">Preparing the dataset</div>', unsafe_allow_html=True)
-original_row_count = len(df)
+original_row_count = report["raw_rows"]
 st.markdown("""
 <div>
     <p>
@@ -18,24 +19,24 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 st.markdown('<div class="section-title">Data Cleaning</div>', unsafe_allow_html=True)
-null_counts = df.isnull().sum()
-null_display = null_counts[null_counts > 0].rename("Null Count").to_frame()
-extra_rows = pd.DataFrame({
-    "Null Count": {
-        "ApprovedBudgetForContract": 157,
-        "ContractCost": 28
-    }
-})
-null_display = pd.concat([null_display, extra_rows], axis=0)
+null_display = pd.DataFrame({
+    "Null Count": pd.Series(report["nulls"], dtype="int64"),
+    "Unparseable Values": pd.Series(report["coercion_failures"], dtype="int64"),
+}).fillna(0).astype("int64")
+null_display = null_display[null_display.sum(axis=1) > 0]
 st.dataframe(null_display)
 
+c_dup, c_coord = st.columns(2)
+c_dup.metric("Duplicate Project IDs", report["duplicate_ids"], border=True)
+c_coord.metric("Coordinates Outside the Philippines", report["out_of_range_coordinates"], border=True)
+
 st.info("""
 We preserved rows with incomplete municipal details since other columns still provide enough location context. However, we removed rows missing essential 
   financial information, as these are required for the analysis.
 """)
 
-df_clean = prep_data(df)
-rows_removed_total = original_row_count - len(df_clean)
+df_clean = get_dataset()
+rows_removed_total = original_row_count - report["clean_rows"]
 
 st.markdown('<div class="section-title">Feature Engineering</div>', unsafe_allow_html=True)
 
@@ -85,13 +86,20 @@ with col2:
 
 st.markdown('<div class="section-title">Filtering</div>', unsafe_allow_html=True)
 
-st.markdown("""
+excluded_years = pd.Series(report["excluded_years"], dtype="int64").rename("Rows Removed")
+excluded_years.index.name = "FundingYear"
+years_text = ", ".join(str(y) for y in EXCLUDED_YEARS[:-1]) + f", and {EXCLUDED_YEARS[-1]}"
+st.markdown(f"""
     <div class="section-description">
-        We removed 700 data points from <b>2018, 2019, 2020, 2021, and 2025</b>
+        We removed {excluded_years.sum():,} data points from <b>{years_text}</b>
     </div>""", unsafe_allow_html=True)
 
-filtered_years = df.loc[df['FundingYear'].isin([2018, 2019, 2020, 2021, 2025])].copy()
-st.dataframe(filtered_years[['FundingYear', 'ContractCost']], width='stretch')
+st.dataframe(excluded_years.to_frame(), width='stretch')
+
+st.dataframe(
+    pd.Series(report["dropped"], dtype="int64").rename("Rows Removed").rename_axis("Cleaning Step").to_frame(),
+    width='stretch'
+)
 
 st.info("""    
     These years contained either insufficient or incomplete data points for the year. The original creator of the dataset mentioned the corresponding
@@ -106,14 +114,14 @@ with col_a:
         st.metric("Original Rows", original_row_count)
 with col_b:
     with st.container(height=130, border=True):
-        st.metric("Rows After Cleaning", len(df_clean), delta=-rows_removed_total)
+        st.metric("Rows After Cleaning", report["clean_rows"], delta=-rows_removed_total)
 with col_c:
     with st.container(height=130, border=True):
-        thing = len(df_clean.columns) - len(df.columns)
-        st.metric("New Features Added", len(df_clean.columns) - len(df.columns), delta=thing)
+        thing = len(report["clean_columns"]) - len(report["raw_columns"])
+        st.metric("New Features Added", thing, delta=thing)
 with col_d:
     with st.container(height=130, border=True):
-        st.metric("Columns Used", len(df_clean.columns))
+        st.metric("Columns Used", len(report["clean_columns"]))
 
 st.info("Added Features Preview")
 st.dataframe(
@@ -122,7 +130,7 @@ st.dataframe(
 )
 
 st.info("Final Dataset Preview")
-st.dataframe(df_clean, width='stretch')
+render_table(df_clean, key="preparation_final")
 
 st.markdown(
     """
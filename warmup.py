@@ -0,0 +1,151 @@
+"""Cache warm-up for FloodGate.
+
+Run `python warmup.py` at container start to build the on-disk artifacts
+(Parquet snapshot, quality report, cost models) before the server starts.
+Start the server with `python serve.py`: it calls start_warmup() at process
+start, before Streamlit's bootstrap, to fill the in-memory analytics and
+Streamlit caches in a background thread. Set FLOODGATE_READY_PORT to expose
+GET /ready (200 when warm, 503 before) for the load balancer; it listens from
+process start, not from the first session.
+"""
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger("floodgate.warmup")
+
+READY_PORT = os.environ.get("FLOODGATE_READY_PORT")
+
+_lock = threading.Lock()
+_started = False
+# Written by the warm-up thread, read by the readiness endpoint: hold _state_lock for both
+_state_lock = threading.Lock()
+state = {"ready": False, "started_at": None, "finished_at": None, "steps": {}, "error": None}
+
+
+def _update(**fields):
+    with _state_lock:
+        state.update(fields)
+
+
+def status():
+    """A consistent copy of the warm-up state, safe to serialize while the warm-up runs"""
+    with _state_lock:
+        return {**state, "steps": dict(state["steps"])}
+
+
+def _step(name, fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    seconds = round(time.perf_counter() - start, 3)
+    with _state_lock:
+        state["steps"][name] = seconds
+    logger.info("Warm-up step %s took %.2fs", name, seconds)
+    return result
+
+
+def warm_caches():
+    """Populates the analytics and Streamlit caches with what a first visitor to each page would need"""
+    from analytics import (
+        load_dataset, load_quality_report, load_cost_models, filter_options, trend_rollup,
+        forensic_results, frame_version, Filters,
+    )
+    from utils import (
+        create_map, get_island_fig, get_region_fig, get_cost_hist_fig, get_project_type_fig,
+        get_contractor_figs, MAP_CENTER, MAP_ZOOM,
+    )
+
+    df = _step("dataset", load_dataset)
+    if df.empty:
+        raise RuntimeError("Dataset is empty; nothing to warm.")
+    version = frame_version(df)
+    _step("quality_report", load_quality_report)
+    _step("cost_models", load_cost_models)
+    _step("filter_options", filter_options, version, df)
+    _step("map", create_map, df, MAP_CENTER, MAP_ZOOM)
+    # Default widget values of the Exploration page
+    _step("island_fig", get_island_fig, df, "Donut Chart")
+    _step("region_fig", get_region_fig, df, 10)
+    _step("cost_hist_fig", get_cost_hist_fig, df, "Contract Cost", 50, True)
+    _step("project_type_fig", get_project_type_fig, df, "Bar Chart")
+    _step("contractor_figs", get_contractor_figs, df)
+    _step("rollup", trend_rollup, df, Filters(), "M", None, "ContractCost")
+    _step("forensics", forensic_results, version, df)
+
+
+def _run():
+    _update(started_at=time.time())
+    try:
+        warm_caches()
+        _update(ready=True)
+    except Exception as e:
+        _update(error=str(e))
+        logger.exception("Cache warm-up failed")
+    finally:
+        _update(finished_at=time.time())
+
+
+class _ReadinessHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip("/") not in ("/ready", ""):
+            self.send_error(404)
+            return
+        current = status()
+        body = json.dumps(current).encode()
+        self.send_response(200 if current["ready"] else 503)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_readiness(port):
+    server = ThreadingHTTPServer(("0.0.0.0", int(port)), _ReadinessHandler)
+    threading.Thread(target=server.serve_forever, name="floodgate-ready", daemon=True).start()
+    return server
+
+
+def start_warmup():
+    """Starts the background warm-up (and readiness endpoint) once per process"""
+    global _started
+    with _lock:
+        if _started:
+            return
+        _started = True
+    if READY_PORT:
+        serve_readiness(READY_PORT)
+    threading.Thread(target=_run, name="floodgate-warmup", daemon=True).start()
+
+
+def is_ready():
+    return status()["ready"]
+
+
+def build_artifacts():
+    """Builds the on-disk snapshot and cost models; meant for container start"""
+    from analytics.dataset import ensure_snapshot
+    from analytics.pipeline import load_cost_models
+
+    def progress(fraction, rows):
+        print(f"\rBuilding snapshot: {fraction:6.1%} ({rows:,} raw rows)", end="", flush=True)
+    rows = ensure_snapshot(on_progress=progress)
+    if rows:
+        print(f"\nSnapshot written: {rows:,} rows")
+    load_cost_models()
+    print("Cost models ready")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    try:
+        build_artifacts()
+    except FileNotFoundError as e:
+        print(f"Warm-up failed: {e}", file=sys.stderr)
+        sys.exit(1)